@@ -0,0 +1,95 @@
+import threading
+import time
+from collections import OrderedDict
+
+from config import CATALOG_CACHE_TTL, CATALOG_CACHE_MAX_ENTRIES
+
+
+class CatalogCache:
+    """
+    Process-wide read-through cache for the chapter/sloka catalog.
+    Entries expire after `ttl` seconds and the least recently used entry is
+    evicted once `max_entries` is reached. Safe to share between Streamlit
+    sessions (threads) of the same process.
+    """
+
+    def __init__(self, ttl: float = CATALOG_CACHE_TTL, max_entries: int = CATALOG_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self):
+        return self.ttl > 0 and self.max_entries > 0
+
+    def get(self, key):
+        """Return (found, value) for key, dropping it if it has expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, value
+
+    def set(self, key, value):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_load(self, key, loader):
+        """
+        Return the cached value for key, calling loader() on a miss.
+        Empty results (None / []) are not cached so that transient errors,
+        which DatabaseManager reports as empty results, are retried.
+        """
+        if not self.enabled:
+            return loader()
+        found, value = self.get(key)
+        if found:
+            return value
+        value = loader()
+        if value:
+            self.set(key, value)
+        return value
+
+    def invalidate(self, prefix=None):
+        """Drop every entry, or only keys whose first element equals prefix."""
+        with self._lock:
+            if prefix is None:
+                self._entries.clear()
+                return
+            for key in [k for k in self._entries if k[0] == prefix]:
+                del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hit_rate': (self.hits / lookups) if lookups else 0.0,
+            }
+
+
+# Global instance shared by every DatabaseManager in the process
+catalog_cache = CatalogCache()
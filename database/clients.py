@@ -0,0 +1,110 @@
+import dataclasses
+import threading
+from typing import TYPE_CHECKING
+
+from config import (SUPABASE_URL, SUPABASE_KEY, SUPABASE_SERVICE_ROLE_KEY, SUPABASE_POOL_SIZE,
+                    SUPABASE_KEEPALIVE_EXPIRY, SUPABASE_TIMEOUT, SUPABASE_CONNECT_TIMEOUT, SUPABASE_HTTP2,
+                    validate_config)
+
+# supabase and httpx take most of a second to import, so they are only imported when the
+# first client is actually needed
+if TYPE_CHECKING:
+    import httpx
+    from supabase import Client
+
+# Which key each shared client role authenticates with. Sign-in/sign-up never uses a
+# shared client (see new_auth_client): a signed-in session switches its client to the
+# user's JWT and keeps the session and refresh timer on it.
+ROLE_KEYS = {
+    'anon': lambda: SUPABASE_KEY,
+    'service': lambda: SUPABASE_SERVICE_ROLE_KEY,
+}
+
+_lock = threading.Lock()
+_http_client = None
+_clients = {}
+
+
+def _http2_available():
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        print("SUPABASE_HTTP2 is set but the h2 package is missing; using HTTP/1.1")
+        return False
+
+
+def get_http_client() -> 'httpx.Client':
+    """
+    The process-wide httpx client (one keep-alive connection pool) that every Supabase
+    client and the resumable uploader send their requests through. Created on first use.
+    """
+    global _http_client
+    if _http_client is None:
+        with _lock:
+            if _http_client is None:
+                import httpx
+                _http_client = httpx.Client(
+                    http2=SUPABASE_HTTP2 and _http2_available(),
+                    limits=httpx.Limits(
+                        max_connections=SUPABASE_POOL_SIZE,
+                        max_keepalive_connections=SUPABASE_POOL_SIZE,
+                        keepalive_expiry=SUPABASE_KEEPALIVE_EXPIRY,
+                    ),
+                    timeout=httpx.Timeout(SUPABASE_TIMEOUT, connect=SUPABASE_CONNECT_TIMEOUT),
+                    follow_redirects=True,
+                )
+    return _http_client
+
+
+def _client_options(**kwargs):
+    from supabase import ClientOptions
+    # supabase-py only accepts an injected httpx client in newer 2.x releases; older
+    # ones get the same timeouts but keep a pool per client
+    if 'httpx_client' in {f.name for f in dataclasses.fields(ClientOptions)}:
+        return ClientOptions(httpx_client=get_http_client(), **kwargs)
+    return ClientOptions(postgrest_client_timeout=SUPABASE_TIMEOUT,
+                         storage_client_timeout=int(SUPABASE_TIMEOUT), **kwargs)
+
+
+def get_client(role: str = 'anon') -> 'Client':
+    """
+    Shared Supabase client for `role` ('anon' or 'service'), created on first use.
+    Clients of both roles reuse the same connection pool; the API key travels in each
+    request's headers, so sharing the pool never mixes credentials.
+    """
+    client = _clients.get(role)
+    if client is None:
+        if role not in ROLE_KEYS:
+            raise ValueError(f"Unknown Supabase client role: {role!r}")
+        validate_config()
+        from supabase import create_client
+        options = _client_options()
+        with _lock:
+            client = _clients.get(role)
+            if client is None:
+                client = create_client(SUPABASE_URL, ROLE_KEYS[role](), options=options)
+                _clients[role] = client
+    return client
+
+
+def new_auth_client() -> 'Client':
+    """
+    A fresh, unshared anon client for one sign-in or sign-up. The user's session, refresh
+    token and JWT stay on this object, so concurrent sign-ins in one process never see each
+    other's; it still sends its requests through the shared connection pool.
+    """
+    validate_config()
+    from supabase import create_client
+    return create_client(SUPABASE_URL, SUPABASE_KEY,
+                         options=_client_options(auto_refresh_token=False, persist_session=False))
+
+
+def close_clients():
+    """Close the shared pool (e.g. at the end of a script); the next get_client() starts afresh."""
+    global _http_client
+    with _lock:
+        _clients.clear()
+        if _http_client is not None:
+            _http_client.close()
+            _http_client = None
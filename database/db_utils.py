@@ -1,20 +1,220 @@
+import base64
+import datetime
+import json
 import os
+import time
 import uuid
-from supabase import create_client, Client
-from config import SUPABASE_URL, SUPABASE_KEY, SUPABASE_SERVICE_ROLE_KEY
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, List, Optional, TypedDict
+from config import (SUPABASE_URL, SUPABASE_KEY, CATALOG_SNAPSHOT_PATH, CATALOG_SNAPSHOT_RECHECK_S,
+                    CATALOG_REFRESH_MARKER,
+                    RESUMABLE_UPLOAD_CHUNK_SIZE, RESUMABLE_UPLOAD_STATE)
+from database.cache import catalog_cache
+from database.clients import get_client, get_http_client
+from database.snapshot import load_snapshot
+
+# Deferred to first use: importing supabase/httpx dominates the cost of importing this module
+if TYPE_CHECKING:
+    from supabase import Client
+
+# Runs the snapshot's database-version checks, so no catalog read waits on them
+_version_checks = ThreadPoolExecutor(max_workers=1, thread_name_prefix="catalog-version")
+
+
+class SubmissionReviewRow(TypedDict):
+    """A row of the submission_review view (see migrations/0003 and 0007)."""
+    id: str
+    user_id: str
+    sloka_id: str
+    recitation_audio_url: Optional[str]
+    explanation_audio_url: Optional[str]
+    status: str
+    admin_notes: Optional[str]
+    audio_metadata: dict
+    created_at: str
+    updated_at: str
+    user_name: Optional[str]
+    user_email: Optional[str]
+    sloka_number: int
+    sloka_text_telugu: str
+    chapter_id: str
+    chapter_number: int
+    chapter_name: str
+    similarity: Optional[dict]
+
+
+class SubmissionReviewPage(TypedDict):
+    rows: List[SubmissionReviewRow]
+    next_cursor: Optional[str]
+    has_more: bool
+
+
+class SubmissionStats(TypedDict):
+    """Counters from the submission_stats table (see migrations/0006_submission_stats.sql)."""
+    total: int
+    by_status: dict
+    by_chapter: dict
+    by_day: dict
+
 
 class DatabaseManager:
     def __init__(self):
-        # Public client (anon) used for storage and regular reads (subject to RLS)
-        self.supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-        # Admin client (service role) for checks/inserts that must bypass RLS (server-side use only)
-        self.admin_client: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+        # Read-through cache for chapter/sloka reads, invalidated by the catalog writes below
+        self.cache = catalog_cache
+        self._snapshot = None
+        self._snapshot_loaded = False
+        self._snapshot_checked_at = 0.0
+        self._snapshot_check = None  # (snapshot, future of catalog_db_version()) while one runs
+        # Bumped on every catalog invalidation; part of catalog_version
+        self._catalog_generation = 0
+        self._catalog_listeners = []
+        self._refresh_marker_seen = None  # mtime of CATALOG_REFRESH_MARKER when last checked
+        self._resumable_uploader = None
+
+    @property
+    def snapshot(self):
+        """
+        Optional local snapshot of the catalog, opened on the first catalog read; reads fall
+        back to Supabase on a miss. It is used only while its recorded database version
+        matches the database (checked on open and every CATALOG_SNAPSHOT_RECHECK_S), so
+        catalog writes by other processes retire it; an unreachable database keeps it. The
+        check runs in the background and the snapshot keeps serving reads until it answers.
+        """
+        if not self._snapshot_loaded:
+            self._snapshot = load_snapshot(CATALOG_SNAPSHOT_PATH)
+            self._snapshot_loaded = True
+            self._snapshot_checked_at = 0.0
+        if self._snapshot is None:
+            return None
+        check = self._snapshot_check
+        if check is not None:
+            checked, future = check
+            if future.done():
+                self._snapshot_check = None
+                db_version = future.result()  # catalog_db_version() never raises
+                if (checked is self._snapshot and db_version is not None
+                        and db_version != checked.meta.get('db_version')):
+                    print(f"Ignoring catalog snapshot {checked.path}: the database has changed since it was built")
+                    checked.close()
+                    self._invalidate_catalog()
+        elif time.monotonic() - self._snapshot_checked_at >= CATALOG_SNAPSHOT_RECHECK_S:
+            self._snapshot_checked_at = time.monotonic()
+            self._snapshot_check = (self._snapshot, _version_checks.submit(self.catalog_db_version))
+        return self._snapshot
+
+    def catalog_db_version(self):
+        """
+        Row counts and latest updated_at of chapters and slokas (updated_at is trigger-maintained,
+        see migrations/0005), in two small queries; None if the database can't be reached.
+        """
+        try:
+            parts = []
+            for table in ('chapters', 'slokas'):
+                result = self.admin_client.table(table).select('updated_at', count='exact') \
+                    .order('updated_at', desc=True, nullsfirst=False).limit(1).execute()
+                latest = result.data[0]['updated_at'] if result.data else ''
+                parts.append(f"{table}={result.count}@{latest}")
+            return ";".join(parts)
+        except Exception as e:
+            print(f"Error reading catalog version: {e}")
+            return None
+
+    @property
+    def supabase(self) -> 'Client':
+        """Public client (anon) used for storage and regular reads (subject to RLS)"""
+        return get_client('anon')
+
+    @property
+    def admin_client(self) -> 'Client':
+        """Admin client (service role) for checks/inserts that must bypass RLS (server-side use only)"""
+        return get_client('service')
+
+    @property
+    def catalog_version(self):
+        """
+        Opaque token that changes whenever catalog reads may return something new: after a
+        catalog write or refresh_catalog() in this process, an admin's request_catalog_refresh()
+        in any process, or when a rebuilt snapshot is picked up. Callers key their own catalog caches on it.
+        """
+        marker = self._refresh_marker_mtime()
+        if self._refresh_marker_seen is None:
+            self._refresh_marker_seen = marker
+        elif marker != self._refresh_marker_seen:
+            self._refresh_marker_seen = marker
+            self.refresh_catalog()  # an admin asked for a reload, possibly from another process
+        snapshot = self.snapshot
+        return f"{self._catalog_generation}:{snapshot.meta.get('source_hash', '') if snapshot else ''}"
+
+    @staticmethod
+    def _refresh_marker_mtime():
+        try:
+            return os.stat(CATALOG_REFRESH_MARKER).st_mtime_ns
+        except OSError:
+            return 0
+
+    def request_catalog_refresh(self):
+        """
+        Admin action: reload the catalog here and, by touching CATALOG_REFRESH_MARKER, in every
+        other app process on this host on its next catalog read.
+        """
+        try:
+            os.makedirs(os.path.dirname(CATALOG_REFRESH_MARKER), exist_ok=True)
+            with open(CATALOG_REFRESH_MARKER, 'a'):
+                pass
+            os.utime(CATALOG_REFRESH_MARKER)
+        except OSError as e:
+            print(f"Error touching catalog refresh marker: {e}")
+        self._refresh_marker_seen = self._refresh_marker_mtime()
+        self.refresh_catalog()
+
+    def add_catalog_listener(self, callback):
+        """Call callback() after every catalog invalidation, e.g. to clear UI-level caches."""
+        if callback not in self._catalog_listeners:
+            self._catalog_listeners.append(callback)
+
+    def _notify_catalog_listeners(self):
+        self._catalog_generation += 1
+        for callback in list(self._catalog_listeners):
+            try:
+                callback()
+            except Exception as e:
+                print(f"Error in catalog listener: {e}")
+
+    def _invalidate_catalog(self):
+        # The snapshot no longer reflects the database once we write through it
+        self.cache.invalidate()
+        self._snapshot = None
+        self._snapshot_loaded = True
+        self._notify_catalog_listeners()
+
+    def refresh_catalog(self):
+        """
+        Drop cached catalog reads and reopen the snapshot from disk, e.g. after
+        db_populator.py or build_catalog_snapshot.py ran in another process.
+        """
+        self.cache.invalidate()
+        if self._snapshot is not None:
+            self._snapshot.close()
+        self._snapshot = None
+        self._snapshot_loaded = False
+        self._notify_catalog_listeners()
+
+    def _read_catalog(self, method: str, *args):
+        if self.snapshot is not None:
+            try:
+                result = getattr(self.snapshot, method)(*args)
+                if result:
+                    return result
+            except Exception as e:
+                print(f"Error reading catalog snapshot ({method}): {e}")
+        return getattr(self, f"_fetch_{method[len('get_'):]}")(*args)
 
     # ---------------- Chapters / Slokas ----------------
     def create_chapter(self, chapter_number: int, chapter_name: str):
         try:
             data = {'chapter_number': chapter_number, 'chapter_name': chapter_name}
             result = self.admin_client.table('chapters').insert(data).execute()
+            self._invalidate_catalog()
             return result.data[0] if result.data else None
         except Exception as e:
             print(f"Error creating chapter {chapter_number}: {e}")
@@ -36,12 +236,17 @@ class DatabaseManager:
                 result = self.admin_client.table('slokas').update(data).eq('id', existing.data[0]['id']).execute()
             else:
                 result = self.admin_client.table('slokas').insert(data).execute()
+            self._invalidate_catalog()
             return result.data[0] if result.data else None
         except Exception as e:
             print(f"Error upserting sloka {sloka_number}: {e}")
             return None
 
     def get_chapter_by_number(self, chapter_number: int):
+        return self.cache.get_or_load(('chapter', int(chapter_number)),
+                                      lambda: self._read_catalog('get_chapter_by_number', chapter_number))
+
+    def _fetch_chapter_by_number(self, chapter_number: int):
         try:
             result = self.supabase.table('chapters').select('*').eq('chapter_number', chapter_number).execute()
             return result.data[0] if result.data else None
@@ -50,6 +255,10 @@ class DatabaseManager:
             return None
 
     def get_sloka_by_chapter_and_number(self, chapter_id: str, sloka_number: int):
+        return self.cache.get_or_load(('sloka', chapter_id, str(sloka_number)),
+                                      lambda: self._read_catalog('get_sloka_by_chapter_and_number', chapter_id, sloka_number))
+
+    def _fetch_sloka_by_chapter_and_number(self, chapter_id: str, sloka_number: int):
         try:
             result = self.supabase.table('slokas').select('*').eq('chapter_id', chapter_id).eq('sloka_number', sloka_number).execute()
             return result.data[0] if result.data else None
@@ -60,12 +269,16 @@ class DatabaseManager:
     def update_sloka_audio_url(self, sloka_id: str, audio_url: str):
         try:
             result = self.admin_client.table('slokas').update({'reference_audio_url': audio_url}).eq('id', sloka_id).execute()
+            self._invalidate_catalog()
             return result.data[0] if result.data else None
         except Exception as e:
             print(f"Error updating sloka audio URL: {e}")
             return None
 
     def get_all_chapters(self):
+        return self.cache.get_or_load(('chapters',), lambda: self._read_catalog('get_all_chapters'))
+
+    def _fetch_all_chapters(self):
         try:
             result = self.supabase.table('chapters').select('*').order('chapter_number').execute()
             return result.data
@@ -74,6 +287,10 @@ class DatabaseManager:
             return []
 
     def get_slokas_by_chapter(self, chapter_id: str):
+        return self.cache.get_or_load(('slokas', chapter_id),
+                                      lambda: self._read_catalog('get_slokas_by_chapter', chapter_id))
+
+    def _fetch_slokas_by_chapter(self, chapter_id: str):
         try:
             result = self.supabase.table('slokas').select('*').eq('chapter_id', chapter_id).order('sloka_number').execute()
             return result.data
@@ -81,6 +298,90 @@ class DatabaseManager:
             print(f"Error getting slokas for chapter {chapter_id}: {e}")
             return []
 
+    def get_sloka_index(self):
+        """
+        Whole catalog as {chapter_number: {sloka_number: sloka_row}}, in two queries.
+        Used by bulk scripts instead of per-sloka lookups.
+        """
+        try:
+            chapters = self.admin_client.table('chapters').select('id, chapter_number').execute().data
+            slokas = self.admin_client.table('slokas').select('*').execute().data
+        except Exception as e:
+            print(f"Error loading sloka index: {e}")
+            return {}
+        chapter_numbers = {c['id']: c['chapter_number'] for c in chapters}
+        index = {c['chapter_number']: {} for c in chapters}
+        for sloka in slokas:
+            chapter_number = chapter_numbers.get(sloka['chapter_id'])
+            if chapter_number is not None:
+                index[chapter_number][sloka['sloka_number']] = sloka
+        return index
+
+    def bulk_update_sloka_audio_urls(self, slokas: list, chunk_size: int = 500):
+        """
+        Write reference_audio_url for many slokas with one upsert per chunk.
+        `slokas` are full sloka rows (e.g. from get_sloka_index) carrying the new url.
+        Returns (updated_ids, failures) where failures maps sloka id -> error message.
+        """
+        return self._bulk_upsert_slokas(slokas, chunk_size)
+
+    def bulk_update_sloka_renditions(self, slokas: list, chunk_size: int = 500):
+        """Same as bulk_update_sloka_audio_urls, for reference_audio_renditions."""
+        return self._bulk_upsert_slokas(slokas, chunk_size)
+
+    def _bulk_upsert_slokas(self, slokas: list, chunk_size: int):
+        # Full rows are sent because the upsert's insert half must satisfy NOT NULL columns
+        columns = ('id', 'chapter_id', 'sloka_number', 'sloka_text_telugu', 'meaning_telugu',
+                   'meaning_english', 'reference_audio_url', 'reference_audio_renditions')
+        updated_ids = []
+        failures = {}
+        for start in range(0, len(slokas), chunk_size):
+            chunk = [{col: sloka[col] for col in columns if col in sloka}
+                     for sloka in slokas[start:start + chunk_size]]
+            try:
+                result = self.admin_client.table('slokas').upsert(chunk, on_conflict='id').execute()
+            except Exception as e:
+                failures.update({row['id']: str(e) for row in chunk})
+                continue
+            returned = {row['id'] for row in result.data or []}
+            for row in chunk:
+                if row['id'] in returned:
+                    updated_ids.append(row['id'])
+                else:
+                    failures[row['id']] = 'Row not returned by upsert'
+        if updated_ids:
+            self._invalidate_catalog()
+        return updated_ids, failures
+
+    # ---------------- Storage ----------------
+    @property
+    def resumable_uploader(self):
+        if self._resumable_uploader is None:
+            from media.resumable_upload import ResumableUploader, UploadStateStore
+            self._resumable_uploader = ResumableUploader.for_supabase(
+                SUPABASE_URL, SUPABASE_KEY,
+                http_client=get_http_client(),
+                state_store=UploadStateStore(RESUMABLE_UPLOAD_STATE),
+                chunk_size=RESUMABLE_UPLOAD_CHUNK_SIZE,
+            )
+        return self._resumable_uploader
+
+    def upload_audio(self, bucket: str, object_name: str, source, content_type: str, owner: str = None,
+                     on_progress=None, max_bytes: int = None):
+        """
+        Chunked, resumable upload of source (bytes or a seekable file object); returns the public URL.
+        File objects are streamed one chunk at a time; max_bytes caps the accepted size.
+        With `owner` set, the upload is keyed by content so retrying the same audio resumes it
+        (and keeps the object name of the first attempt).
+        """
+        from media.resumable_upload import content_fingerprint
+        fingerprint = content_fingerprint(bucket, owner, source) if owner else None
+        stored_name = self.resumable_uploader.upload(
+            source, bucket, object_name, content_type=content_type, upsert=False, fingerprint=fingerprint,
+            on_progress=on_progress, max_bytes=max_bytes
+        )
+        return self.supabase.storage.from_(bucket).get_public_url(stored_name)
+
     # ---------------- Users ----------------
     def create_user(self, user_id: str, name: str, email: str):
         """
@@ -138,7 +439,14 @@ class DatabaseManager:
             raise Exception(f"Error creating user: {e}")
 
     # ---------------- Submissions ----------------
-    def create_user_submission(self, user_id: str, sloka_id: str, recitation_audio_url: str = None, explanation_audio_url: str = None):
+    def create_user_submission(self, user_id: str, sloka_id: str, recitation_audio_url: str = None,
+                               explanation_audio_url: str = None, audio_metadata: dict = None,
+                               submission_id: str = None):
+        """
+        Insert a submission. With a client-generated submission_id the insert is idempotent
+        (ON CONFLICT (id) DO NOTHING), so it can be retried after a timeout without creating
+        a duplicate; the existing row is returned in that case.
+        """
         try:
             data = {
                 'user_id': user_id,
@@ -147,26 +455,84 @@ class DatabaseManager:
                 'explanation_audio_url': explanation_audio_url,
                 'status': 'Submitted'
             }
-            result = self.admin_client.table('user_submissions').insert(data).execute()
+            if audio_metadata:
+                data['audio_metadata'] = audio_metadata
+            table = self.admin_client.table('user_submissions')
+            if submission_id:
+                data['id'] = submission_id
+                result = table.upsert(data, on_conflict='id', ignore_duplicates=True).execute()
+                if not result.data:  # saved by an earlier attempt
+                    result = self.admin_client.table('user_submissions').select('*').eq('id', submission_id).execute()
+            else:
+                result = table.insert(data).execute()
             return result.data[0] if result.data else None
         except Exception as e:
             print(f"Error creating user submission: {e}")
             return None
 
-    def get_user_submissions(self, user_id: str = None, sloka_id: str = None, status: str = None):
+    @staticmethod
+    def encode_cursor(row: dict):
+        """Opaque keyset cursor for the (created_at, id) position of row."""
+        raw = json.dumps([row['created_at'], row['id']]).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii')
+
+    @staticmethod
+    def decode_cursor(cursor: str):
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        return created_at, row_id
+
+    def _keyset_page(self, query, page_size: int, cursor: str = None):
+        if cursor:
+            created_at, row_id = self.decode_cursor(cursor)
+            query = query.or_(f'created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{row_id})')
+        # One extra row tells us whether another page exists
+        result = query.order('created_at', desc=True).order('id', desc=True).limit(page_size + 1).execute()
+        rows = result.data or []
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        return {
+            'rows': rows,
+            'next_cursor': self.encode_cursor(rows[-1]) if has_more and rows else None,
+            'has_more': has_more,
+        }
+
+    def get_user_submissions(self, user_id: Optional[str] = None, sloka_id: Optional[str] = None,
+                             status: Optional[str] = None, page_size: int = 20,
+                             cursor: Optional[str] = None) -> SubmissionReviewPage:
+        """
+        One page of submissions, newest first, filtered by user, sloka and status. Rows come
+        from the submission_review view (user and verse columns already joined); pass the
+        returned next_cursor to get the following page.
+        """
         try:
-            query = self.admin_client.table('user_submissions').select('*, users(name, email), slokas(sloka_number, sloka_text_telugu)')
+            query = self.admin_client.table('submission_review').select('*')
             if user_id:
                 query = query.eq('user_id', user_id)
             if sloka_id:
                 query = query.eq('sloka_id', sloka_id)
             if status:
                 query = query.eq('status', status)
-            result = query.order('created_at', desc=True).execute()
-            return result.data
+            return self._keyset_page(query, page_size, cursor)
         except Exception as e:
             print(f"Error getting user submissions: {e}")
-            return []
+            return {'rows': [], 'next_cursor': None, 'has_more': False}
+
+    def get_review_submissions(self, status: Optional[str] = None, chapter_number: Optional[int] = None,
+                               page_size: int = 20, cursor: Optional[str] = None) -> SubmissionReviewPage:
+        """
+        One page of the submission_review view (submissions joined with users, slokas and
+        chapters), filtered by status and chapter number in the database.
+        """
+        try:
+            query = self.admin_client.table('submission_review').select('*')
+            if status:
+                query = query.eq('status', status)
+            if chapter_number is not None:
+                query = query.eq('chapter_number', chapter_number)
+            return self._keyset_page(query, page_size, cursor)
+        except Exception as e:
+            print(f"Error getting review submissions: {e}")
+            return {'rows': [], 'next_cursor': None, 'has_more': False}
 
     def update_submission_status(self, submission_id: str, status: str, admin_notes: str = None):
         try:
@@ -179,6 +545,48 @@ class DatabaseManager:
             print(f"Error updating submission status: {e}")
             return None
 
+    def update_submission_similarity(self, submission_id: str, similarity: dict):
+        """Record the automatic similarity score (see media/scoring.py) on a submission."""
+        try:
+            result = self.admin_client.table('user_submissions').update(
+                {'similarity': similarity}
+            ).eq('id', submission_id).execute()
+            return result.data[0] if result.data else None
+        except Exception as e:
+            print(f"Error updating submission similarity: {e}")
+            return None
+
+    def get_submission_stats(self, days: int = 30) -> SubmissionStats:
+        """
+        Submission counts by status, overall, per chapter and per day for the last `days`
+        days, read in one query from the trigger-maintained submission_stats table.
+        by_chapter maps chapter_number -> {status: count}; by_day maps 'YYYY-MM-DD' -> {status: count}.
+        """
+        stats = {'total': 0, 'by_status': {}, 'by_chapter': {}, 'by_day': {}}
+        try:
+            since = (datetime.datetime.now(datetime.timezone.utc).date() - datetime.timedelta(days=days - 1)).isoformat()
+            result = self.admin_client.table('submission_stats').select('dimension, bucket, status, count').or_(
+                f'dimension.neq.day,bucket.gte.{since}'
+            ).execute()
+        except Exception as e:
+            print(f"Error getting submission stats: {e}")
+            return stats
+
+        for row in result.data or []:
+            if not row['count']:
+                continue
+            if row['dimension'] == 'total':
+                stats['by_status'][row['status']] = row['count']
+                stats['total'] += row['count']
+            elif row['dimension'] == 'chapter':
+                stats['by_chapter'].setdefault(int(row['bucket']), {})[row['status']] = row['count']
+            elif row['dimension'] == 'day':
+                stats['by_day'].setdefault(row['bucket'], {})[row['status']] = row['count']
+        return stats
+
+    def get_cache_stats(self):
+        return self.cache.stats()
+
     # exposing admin_client for convenience if needed elsewhere (use carefully)
     @property
     def admin(self):
@@ -0,0 +1,2 @@
+-- Low-bitrate renditions of the reference audio: [{codec, bitrate_kbps, mime, url, size}]
+ALTER TABLE slokas ADD COLUMN IF NOT EXISTS reference_audio_renditions JSONB DEFAULT '[]'::jsonb;
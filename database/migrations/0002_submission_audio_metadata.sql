@@ -0,0 +1,3 @@
+-- Per-audio details recorded at submission time:
+-- {"recitation": {duration_s, sample_rate, channels, codec, bytes, ...}, "explanation": {...}}
+ALTER TABLE user_submissions ADD COLUMN IF NOT EXISTS audio_metadata JSONB DEFAULT '{}'::jsonb;
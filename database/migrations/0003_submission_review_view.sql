@@ -0,0 +1,25 @@
+-- Submissions joined with users, slokas and chapters for the admin review page
+CREATE OR REPLACE VIEW submission_review
+WITH (security_invoker = true) AS
+SELECT
+    us.id,
+    us.user_id,
+    us.sloka_id,
+    us.recitation_audio_url,
+    us.explanation_audio_url,
+    us.status,
+    us.admin_notes,
+    us.audio_metadata,
+    us.created_at,
+    us.updated_at,
+    u.name AS user_name,
+    u.email AS user_email,
+    s.sloka_number,
+    s.sloka_text_telugu,
+    s.chapter_id,
+    c.chapter_number,
+    c.chapter_name
+FROM user_submissions us
+LEFT JOIN users u ON u.id = us.user_id  -- no FK yet, so keep submissions of missing users
+JOIN slokas s ON s.id = us.sloka_id
+JOIN chapters c ON c.id = s.chapter_id;
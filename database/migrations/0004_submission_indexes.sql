@@ -0,0 +1,18 @@
+-- Indexes for the hot user_submissions access paths. Each ends in (created_at, id) so
+-- keyset-paginated "newest first" pages are read straight off the index.
+
+-- Admin review queue: WHERE status = ? ORDER BY created_at DESC, id DESC
+CREATE INDEX IF NOT EXISTS idx_user_submissions_status_created
+    ON user_submissions (status, created_at DESC, id DESC);
+
+-- A learner's history: WHERE user_id = ? ORDER BY created_at DESC, id DESC
+CREATE INDEX IF NOT EXISTS idx_user_submissions_user_created
+    ON user_submissions (user_id, created_at DESC, id DESC);
+
+-- Per-sloka lookups, chapter filters (via slokas) and the FK's ON DELETE CASCADE
+CREATE INDEX IF NOT EXISTS idx_user_submissions_sloka
+    ON user_submissions (sloka_id, created_at DESC, id DESC);
+
+-- Unfiltered review pages
+CREATE INDEX IF NOT EXISTS idx_user_submissions_created
+    ON user_submissions (created_at DESC, id DESC);
@@ -0,0 +1,34 @@
+-- Keep updated_at current on every table; nothing in the app sets it explicitly
+CREATE OR REPLACE FUNCTION set_updated_at()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    NEW.updated_at = now();
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS chapters_set_updated_at ON chapters;
+CREATE TRIGGER chapters_set_updated_at
+    BEFORE UPDATE ON chapters
+    FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*)
+    EXECUTE FUNCTION set_updated_at();
+
+DROP TRIGGER IF EXISTS slokas_set_updated_at ON slokas;
+CREATE TRIGGER slokas_set_updated_at
+    BEFORE UPDATE ON slokas
+    FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*)
+    EXECUTE FUNCTION set_updated_at();
+
+DROP TRIGGER IF EXISTS users_set_updated_at ON users;
+CREATE TRIGGER users_set_updated_at
+    BEFORE UPDATE ON users
+    FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*)
+    EXECUTE FUNCTION set_updated_at();
+
+DROP TRIGGER IF EXISTS user_submissions_set_updated_at ON user_submissions;
+CREATE TRIGGER user_submissions_set_updated_at
+    BEFORE UPDATE ON user_submissions
+    FOR EACH ROW WHEN (OLD.* IS DISTINCT FROM NEW.*)
+    EXECUTE FUNCTION set_updated_at();
@@ -0,0 +1,106 @@
+-- Submission counters by status overall, per chapter and per day, kept current by a
+-- trigger so the admin statistics page reads a few dozen rows instead of every submission.
+--   dimension 'total':   bucket ''
+--   dimension 'chapter': bucket = chapter_number
+--   dimension 'day':     bucket = created_at date (UTC), YYYY-MM-DD
+CREATE TABLE IF NOT EXISTS submission_stats (
+    dimension TEXT NOT NULL CHECK (dimension IN ('total', 'chapter', 'day')),
+    bucket TEXT NOT NULL DEFAULT '',
+    status TEXT NOT NULL,
+    count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (dimension, bucket, status)
+);
+
+ALTER TABLE submission_stats DISABLE ROW LEVEL SECURITY;
+
+CREATE OR REPLACE FUNCTION bump_submission_stats(p_sloka_id UUID, p_created_at TIMESTAMPTZ,
+                                                 p_status TEXT, p_delta INTEGER)
+RETURNS VOID
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_chapter INTEGER;
+BEGIN
+    SELECT c.chapter_number INTO v_chapter
+    FROM slokas s JOIN chapters c ON c.id = s.chapter_id
+    WHERE s.id = p_sloka_id;
+
+    INSERT INTO submission_stats (dimension, bucket, status, count)
+    VALUES ('total', '', p_status, p_delta),
+           ('day', to_char(p_created_at AT TIME ZONE 'UTC', 'YYYY-MM-DD'), p_status, p_delta)
+    ON CONFLICT (dimension, bucket, status)
+    DO UPDATE SET count = submission_stats.count + EXCLUDED.count;
+
+    -- The sloka is already gone when its submissions are removed by ON DELETE CASCADE;
+    -- refresh_submission_stats() fixes the chapter counters after such a delete
+    IF v_chapter IS NOT NULL THEN
+        INSERT INTO submission_stats (dimension, bucket, status, count)
+        VALUES ('chapter', v_chapter::TEXT, p_status, p_delta)
+        ON CONFLICT (dimension, bucket, status)
+        DO UPDATE SET count = submission_stats.count + EXCLUDED.count;
+    END IF;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION track_submission_stats()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM bump_submission_stats(OLD.sloka_id, OLD.created_at, OLD.status, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM bump_submission_stats(NEW.sloka_id, NEW.created_at, NEW.status, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS user_submissions_track_stats ON user_submissions;
+CREATE TRIGGER user_submissions_track_stats
+    AFTER INSERT OR DELETE ON user_submissions
+    FOR EACH ROW EXECUTE FUNCTION track_submission_stats();
+
+DROP TRIGGER IF EXISTS user_submissions_track_stats_update ON user_submissions;
+CREATE TRIGGER user_submissions_track_stats_update
+    AFTER UPDATE OF status, sloka_id, created_at ON user_submissions
+    FOR EACH ROW
+    WHEN (OLD.status IS DISTINCT FROM NEW.status
+          OR OLD.sloka_id IS DISTINCT FROM NEW.sloka_id
+          OR OLD.created_at IS DISTINCT FROM NEW.created_at)
+    EXECUTE FUNCTION track_submission_stats();
+
+-- Recount everything from user_submissions; used for the backfill below and to repair drift
+CREATE OR REPLACE FUNCTION refresh_submission_stats()
+RETURNS VOID
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    LOCK TABLE submission_stats IN EXCLUSIVE MODE;
+    DELETE FROM submission_stats;
+
+    INSERT INTO submission_stats (dimension, bucket, status, count)
+    SELECT 'total', '', status, count(*)
+    FROM user_submissions
+    GROUP BY status;
+
+    INSERT INTO submission_stats (dimension, bucket, status, count)
+    SELECT 'chapter', c.chapter_number::TEXT, us.status, count(*)
+    FROM user_submissions us
+    JOIN slokas s ON s.id = us.sloka_id
+    JOIN chapters c ON c.id = s.chapter_id
+    GROUP BY c.chapter_number, us.status;
+
+    INSERT INTO submission_stats (dimension, bucket, status, count)
+    SELECT 'day', to_char(created_at AT TIME ZONE 'UTC', 'YYYY-MM-DD'), status, count(*)
+    FROM user_submissions
+    GROUP BY 2, status;
+END;
+$$;
+
+SELECT refresh_submission_stats();
@@ -0,0 +1,37 @@
+-- Automatic similarity of the recitation to the verse's reference audio, written by
+-- scripts/score_submissions.py: {score, distance, tempo_ratio, duration_s,
+-- reference_duration_s, segments: [{ref_start_s, ref_end_s, start_s, end_s, offset_s,
+-- tempo_ratio, cost}], scored_at}
+ALTER TABLE user_submissions ADD COLUMN IF NOT EXISTS similarity JSONB;
+
+-- Let the review queue sort and filter by score without unpacking the JSON per row
+CREATE INDEX IF NOT EXISTS idx_user_submissions_similarity_score
+    ON user_submissions (((similarity->>'score')::numeric))
+    WHERE similarity IS NOT NULL;
+
+-- Same as 0003 with similarity appended (CREATE OR REPLACE VIEW can only add columns at the end)
+CREATE OR REPLACE VIEW submission_review
+WITH (security_invoker = true) AS
+SELECT
+    us.id,
+    us.user_id,
+    us.sloka_id,
+    us.recitation_audio_url,
+    us.explanation_audio_url,
+    us.status,
+    us.admin_notes,
+    us.audio_metadata,
+    us.created_at,
+    us.updated_at,
+    u.name AS user_name,
+    u.email AS user_email,
+    s.sloka_number,
+    s.sloka_text_telugu,
+    s.chapter_id,
+    c.chapter_number,
+    c.chapter_name,
+    us.similarity
+FROM user_submissions us
+LEFT JOIN users u ON u.id = us.user_id  -- no FK yet, so keep submissions of missing users
+JOIN slokas s ON s.id = us.sloka_id
+JOIN chapters c ON c.id = s.chapter_id;
@@ -1,3 +1,6 @@
+-- Baseline schema. Changes after the baseline live in database/migrations/ and are
+-- applied in order by scripts/apply_migrations.py (or pasted into the SQL editor).
+
 -- =====================================
 -- Enable UUID Extension
 -- =====================================
@@ -0,0 +1,178 @@
+import glob
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+# Bump when the snapshot table layout changes; older files are then ignored
+SNAPSHOT_FORMAT_VERSION = 3
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+SLOKA_COLUMNS = ['id', 'chapter_id', 'sloka_number', 'sloka_text_telugu', 'meaning_telugu',
+                 'meaning_english', 'reference_audio_url', 'reference_audio_renditions',
+                 'created_at', 'updated_at']
+CHAPTER_COLUMNS = ['id', 'chapter_number', 'chapter_name', 'created_at', 'updated_at']
+
+
+def chapter_json_files(data_dir: str = DATA_DIR):
+    return sorted(glob.glob(os.path.join(data_dir, "chapter*.json")))
+
+
+def source_hash(json_files):
+    """sha256 over the chapter JSON files, used as the snapshot's catalog version."""
+    digest = hashlib.sha256()
+    for path in json_files:
+        digest.update(os.path.basename(path).encode('utf-8'))
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def build_snapshot(out_path: str, json_files, chapters: list, slokas: list, db_version: str = ''):
+    """
+    Compile the database rows and the chapter JSON files into an indexed SQLite file.
+    Every chapter and sloka in the database is included; text comes from the JSON files
+    where they have the verse, ids / audio urls / timestamps always from the database rows.
+    db_version (DatabaseManager.catalog_db_version()) is stored so readers can tell when
+    the database has changed since. Returns (chapter_count, sloka_count, skipped) where
+    skipped lists JSON entries that have no matching database row.
+    """
+    chapters_by_number = {int(c['chapter_number']): c for c in chapters}
+    db_slokas = {(s['chapter_id'], int(s['sloka_number'])): s for s in slokas}
+
+    texts = {}
+    skipped = []
+    for path in json_files:
+        with open(path, 'r', encoding='utf-8') as f:
+            entries = json.load(f)
+        for entry in entries if isinstance(entries, list) else []:
+            if 'sloka_number' not in entry:
+                continue
+            chapter = chapters_by_number.get(int(entry.get('chapter', 0)))
+            key = (chapter['id'], int(entry['sloka_number'])) if chapter else None
+            if key not in db_slokas:
+                skipped.append((entry.get('chapter'), entry['sloka_number']))
+                continue
+            texts[key] = entry
+
+    chapter_rows = {c['id']: c for c in chapters}
+    sloka_rows = []
+    for key, sloka in db_slokas.items():
+        entry = texts.get(key, {})
+        sloka_rows.append(dict(
+            sloka,
+            sloka_text_telugu=entry.get('sloka_text', sloka.get('sloka_text_telugu')),
+            meaning_telugu=entry.get('telugu_meaning', sloka.get('meaning_telugu')),
+            meaning_english=entry.get('english_meaning', sloka.get('meaning_english')),
+        ))
+
+    # Build next to the target and swap in atomically so readers never see a partial file
+    tmp_path = out_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript("""
+            CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TABLE chapters (
+                id TEXT PRIMARY KEY, chapter_number INTEGER UNIQUE NOT NULL, chapter_name TEXT NOT NULL,
+                created_at TEXT, updated_at TEXT
+            );
+            CREATE TABLE slokas (
+                id TEXT PRIMARY KEY, chapter_id TEXT NOT NULL, sloka_number INTEGER NOT NULL,
+                sloka_text_telugu TEXT, meaning_telugu TEXT, meaning_english TEXT,
+                reference_audio_url TEXT, reference_audio_renditions TEXT, created_at TEXT, updated_at TEXT,
+                UNIQUE(chapter_id, sloka_number)
+            );
+        """)
+        conn.executemany(
+            f"INSERT INTO chapters ({', '.join(CHAPTER_COLUMNS)}) VALUES ({', '.join('?' * len(CHAPTER_COLUMNS))})",
+            [tuple(c.get(col) for col in CHAPTER_COLUMNS) for c in chapter_rows.values()],
+        )
+        conn.executemany(
+            f"INSERT INTO slokas ({', '.join(SLOKA_COLUMNS)}) VALUES ({', '.join('?' * len(SLOKA_COLUMNS))})",
+            [tuple(json.dumps(s.get(col) or []) if col == 'reference_audio_renditions' else s.get(col)
+                   for col in SLOKA_COLUMNS) for s in sloka_rows],
+        )
+        conn.executemany("INSERT INTO meta (key, value) VALUES (?, ?)", [
+            ('format_version', str(SNAPSHOT_FORMAT_VERSION)),
+            ('source_hash', source_hash(json_files)),
+            ('db_version', db_version or ''),
+            ('built_at', datetime.now(timezone.utc).isoformat()),
+        ])
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, out_path)
+    return len(chapter_rows), len(sloka_rows), skipped
+
+
+class CatalogSnapshot:
+    """Read-only view over a snapshot file, returning rows shaped like the Supabase ones."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        self.meta = {row['key']: row['value'] for row in self._query("SELECT key, value FROM meta")}
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params).fetchall()]
+
+    @property
+    def format_version(self):
+        return int(self.meta.get('format_version', 0))
+
+    def close(self):
+        self._conn.close()
+
+    def get_all_chapters(self):
+        return self._query("SELECT * FROM chapters ORDER BY chapter_number")
+
+    def get_chapter_by_number(self, chapter_number: int):
+        rows = self._query("SELECT * FROM chapters WHERE chapter_number = ?", (int(chapter_number),))
+        return rows[0] if rows else None
+
+    @staticmethod
+    def _sloka_row(row):
+        row['reference_audio_renditions'] = json.loads(row.get('reference_audio_renditions') or '[]')
+        return row
+
+    def get_slokas_by_chapter(self, chapter_id: str):
+        rows = self._query("SELECT * FROM slokas WHERE chapter_id = ? ORDER BY sloka_number", (chapter_id,))
+        return [self._sloka_row(row) for row in rows]
+
+    def get_sloka_by_chapter_and_number(self, chapter_id: str, sloka_number: int):
+        rows = self._query("SELECT * FROM slokas WHERE chapter_id = ? AND sloka_number = ?",
+                           (chapter_id, int(sloka_number)))
+        return self._sloka_row(rows[0]) if rows else None
+
+
+def load_snapshot(path: str, data_dir: str = DATA_DIR):
+    """
+    Open the snapshot at path, or return None when it is missing, unreadable, built by
+    an older format, or out of date with the chapter JSON files it was compiled from.
+    Whether the database has changed since is checked by the caller (meta['db_version']).
+    """
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        snapshot = CatalogSnapshot(path)
+    except sqlite3.Error as e:
+        print(f"Ignoring catalog snapshot {path}: {e}")
+        return None
+    if snapshot.format_version != SNAPSHOT_FORMAT_VERSION:
+        print(f"Ignoring catalog snapshot {path}: format {snapshot.format_version}, expected {SNAPSHOT_FORMAT_VERSION}")
+        snapshot.close()
+        return None
+    json_files = chapter_json_files(data_dir)
+    if json_files and snapshot.meta.get('source_hash') != source_hash(json_files):
+        print(f"Ignoring catalog snapshot {path}: data/ has changed since it was built")
+        snapshot.close()
+        return None
+    return snapshot
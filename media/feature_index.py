@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+
+from config import REFERENCE_FEATURES_DIR
+from media import scoring
+
+INDEX_FILENAME = 'index.json'
+
+# Anything that changes the stored features; a store built with other values is rebuilt in full
+FEATURE_PARAMS = {
+    'sample_rate': scoring.SCORING_SAMPLE_RATE,
+    'frame_length': scoring.FRAME_LENGTH,
+    'hop_length': scoring.HOP_LENGTH,
+    'n_fft': scoring.N_FFT,
+    'n_mels': scoring.N_MELS,
+    'n_mfcc': scoring.N_MFCC,
+    'max_frames': scoring.MAX_FRAMES,
+}
+
+
+def verse_key(chapter_number, sloka_number):
+    return f"{chapter_number}/{sloka_number}"
+
+
+def content_hash(path: str):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def extract_reference_features(path: str):
+    """Decode one reference file and compute its alignment-ready features. Runs in a worker process."""
+    return scoring.prepare_features(scoring.decode_audio(path))
+
+
+def read_index(directory: str = REFERENCE_FEATURES_DIR):
+    """The store's index.json, or None if there is no store (or it is unreadable)."""
+    try:
+        with open(os.path.join(directory, INDEX_FILENAME), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_store(entries: dict, arrays: dict, directory: str = REFERENCE_FEATURES_DIR):
+    """
+    Pack arrays ({key: (frames, dims) float32}) into one new features-<n>.npy, then swap in an
+    index.json pointing at it. Both are written under temporary names and renamed, so a reader
+    always sees a complete index and the file it names; readers still mapping the previous
+    features file keep their mapping after it is unlinked.
+    """
+    os.makedirs(directory, exist_ok=True)
+    previous = read_index(directory) or {}
+    generation = previous.get('generation', 0) + 1
+    features_file = f"features-{generation}.npy"
+
+    keys = sorted(arrays)
+    dims = arrays[keys[0]].shape[1] if keys else scoring.N_MFCC - 1
+    total = sum(len(arrays[key]) for key in keys)
+    tmp_features = os.path.join(directory, f"{features_file}.tmp")
+    packed = np.lib.format.open_memmap(tmp_features, mode='w+', dtype=np.float32, shape=(total, dims))
+    offset = 0
+    for key in keys:
+        frames = len(arrays[key])
+        packed[offset:offset + frames] = arrays[key]
+        entries[key]['offset'] = offset
+        entries[key]['frames'] = frames
+        offset += frames
+    packed.flush()
+    del packed
+    os.replace(tmp_features, os.path.join(directory, features_file))
+
+    index = {'generation': generation, 'features_file': features_file, 'params': FEATURE_PARAMS,
+             'dims': dims, 'entries': {key: entries[key] for key in keys}}
+    tmp_index = os.path.join(directory, f"{INDEX_FILENAME}.tmp")
+    with open(tmp_index, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=1)
+    os.replace(tmp_index, os.path.join(directory, INDEX_FILENAME))
+
+    for name in os.listdir(directory):
+        if name.startswith('features-') and name.endswith('.npy') and name != features_file:
+            os.remove(os.path.join(directory, name))
+    return index
+
+
+class ReferenceFeatureIndex:
+    """
+    Read-only view of the reference feature store built by scripts/build_feature_index.py.
+    The packed features file is memory-mapped, so lookups return views into the page cache
+    and every process reading the store shares one copy. A rebuilt store is picked up on the
+    next lookup after index.json changes.
+    """
+
+    def __init__(self, directory: str = REFERENCE_FEATURES_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._index = None
+        self._features = None
+
+    def _current(self):
+        try:
+            st = os.stat(os.path.join(self.directory, INDEX_FILENAME))
+            stamp = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            stamp = None
+        with self._lock:
+            if stamp != self._stamp:
+                index = read_index(self.directory) if stamp else None
+                features = None
+                if index and index.get('params') == FEATURE_PARAMS:
+                    try:
+                        features = np.load(os.path.join(self.directory, index['features_file']), mmap_mode='r')
+                    except (OSError, ValueError) as e:
+                        print(f"Error opening reference feature store: {e}")
+                        index = None
+                else:
+                    index = None  # missing, or built with other feature parameters
+                self._stamp, self._index, self._features = stamp, index, features
+            return self._index, self._features
+
+    def get(self, chapter_number, sloka_number):
+        """
+        prepare_features()-style {'features', 'frame_s', 'duration_s', 'sha256'} for a verse,
+        with 'features' a read-only view into the mapped store; None if it is not indexed.
+        """
+        index, features = self._current()
+        entry = index['entries'].get(verse_key(chapter_number, sloka_number)) if index else None
+        if entry is None:
+            return None
+        return {
+            'features': features[entry['offset']:entry['offset'] + entry['frames']],
+            'frame_s': entry['frame_s'],
+            'duration_s': entry['duration_s'],
+            'sha256': entry['sha256'],
+        }
+
+    def __contains__(self, verse):
+        index, _ = self._current()
+        return bool(index) and verse_key(*verse) in index['entries']
+
+    def __len__(self):
+        index, _ = self._current()
+        return len(index['entries']) if index else 0
+
+
+_feature_index = None
+
+
+def get_feature_index():
+    """The process-wide ReferenceFeatureIndex over REFERENCE_FEATURES_DIR."""
+    global _feature_index
+    if _feature_index is None:
+        _feature_index = ReferenceFeatureIndex()
+    return _feature_index
@@ -0,0 +1,77 @@
+import base64
+import os
+import uuid
+
+import httpx
+
+
+class LocalTusStorage:
+    """
+    Minimal TUS server stand-in that stores objects under a local directory.
+    Use it through httpx.MockTransport to exercise ResumableUploader without Supabase:
+
+        storage = LocalTusStorage('/tmp/storage')
+        client = httpx.Client(transport=storage.transport())
+        ResumableUploader('http://local/upload', 'key', http_client=client).upload(...)
+
+    `fail_after_bytes` makes a PATCH stop after that many bytes of its chunk have been
+    written, simulating a dropped connection mid-transfer.
+    """
+
+    def __init__(self, root: str, fail_after_bytes: int = None):
+        self.root = root
+        self.fail_after_bytes = fail_after_bytes
+        self.uploads = {}
+        self.requests = []
+
+    def transport(self):
+        return httpx.MockTransport(self.handle)
+
+    def object_path(self, bucket: str, object_name: str):
+        return os.path.join(self.root, bucket, *object_name.split('/'))
+
+    def handle(self, request: httpx.Request):
+        self.requests.append((request.method, request.url.path))
+        if request.method == 'POST':
+            return self._create(request)
+        upload_id = request.url.path.rstrip('/').rsplit('/', 1)[-1]
+        upload = self.uploads.get(upload_id)
+        if upload is None:
+            return httpx.Response(404)
+        if request.method == 'HEAD':
+            return httpx.Response(200, headers={'Upload-Offset': str(upload['offset']),
+                                                'Upload-Length': str(upload['length'])})
+        if request.method == 'PATCH':
+            return self._patch(upload, request)
+        return httpx.Response(405)
+
+    def _create(self, request):
+        metadata = {}
+        for pair in request.headers.get('Upload-Metadata', '').split(','):
+            if pair:
+                key, _, value = pair.partition(' ')
+                metadata[key] = base64.b64decode(value).decode('utf-8')
+        upload_id = uuid.uuid4().hex
+        path = self.object_path(metadata['bucketName'], metadata['objectName'])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        open(path + '.part', 'wb').close()
+        self.uploads[upload_id] = {'path': path, 'offset': 0, 'length': int(request.headers['Upload-Length'])}
+        return httpx.Response(201, headers={'Location': f"{request.url.path.rstrip('/')}/{upload_id}"})
+
+    def _patch(self, upload, request):
+        offset = int(request.headers['Upload-Offset'])
+        if offset != upload['offset']:
+            return httpx.Response(409)
+        body = request.read()
+        failing = self.fail_after_bytes is not None
+        if failing:
+            body = body[:self.fail_after_bytes]
+            self.fail_after_bytes = None
+        with open(upload['path'] + '.part', 'ab') as f:
+            f.write(body)
+        upload['offset'] += len(body)
+        if failing:
+            raise httpx.ReadError('simulated connection drop')
+        if upload['offset'] >= upload['length']:
+            os.replace(upload['path'] + '.part', upload['path'])
+        return httpx.Response(204, headers={'Upload-Offset': str(upload['offset'])})
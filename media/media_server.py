@@ -0,0 +1,201 @@
+import hashlib
+import os
+import re
+import threading
+from email.utils import formatdate
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote, unquote, urlsplit
+
+from config import (REFERENCE_RENDITIONS_DIR, LOCAL_MEDIA_HOST, LOCAL_MEDIA_PORT, LOCAL_MEDIA_BASE_URL,
+                    LOCAL_MEDIA_MAX_AGE)
+from media.renditions import RENDITION_SPECS, UNIVERSAL_MIMES, rendition_filename, pick_reference_audio
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# URL prefix -> directory served under it
+MEDIA_ROOTS = {
+    'slokas': os.path.join(PROJECT_ROOT, 'slokas'),
+    'renditions': os.path.abspath(REFERENCE_RENDITIONS_DIR),
+}
+
+CONTENT_TYPES = {'.mp3': 'audio/mpeg', '.opus': 'audio/ogg', '.ogg': 'audio/ogg', '.m4a': 'audio/mp4'}
+
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+_etag_lock = threading.Lock()
+_etags = {}  # path -> (mtime_ns, size, etag)
+
+
+def file_etag(path: str):
+    """Strong ETag from the file's content hash, recomputed only when its mtime or size changes."""
+    st = os.stat(path)
+    with _etag_lock:
+        cached = _etags.get(path)
+        if cached and cached[:2] == (st.st_mtime_ns, st.st_size):
+            return cached[2]
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    etag = f'"{digest.hexdigest()[:32]}"'
+    with _etag_lock:
+        _etags[path] = (st.st_mtime_ns, st.st_size, etag)
+    return etag
+
+
+def resolve_media_path(url_path: str):
+    """Map /<root>/<relative path> to a servable file inside that root, or None."""
+    parts = unquote(url_path).lstrip('/').split('/', 1)
+    if len(parts) != 2 or parts[0] not in MEDIA_ROOTS:
+        return None
+    root = MEDIA_ROOTS[parts[0]]
+    path = os.path.realpath(os.path.join(root, parts[1]))
+    if os.path.commonpath([path, os.path.realpath(root)]) != os.path.realpath(root):
+        return None
+    if os.path.splitext(path)[1].lower() not in CONTENT_TYPES or not os.path.isfile(path):
+        return None
+    return path
+
+
+def parse_range(header: str, size: int):
+    """
+    (start, end) inclusive for a single 'bytes=' range, None to serve the whole file (no
+    header, or several ranges, which we may ignore), or 'unsatisfiable'.
+    """
+    if not header:
+        return None
+    match = _RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if size == 0:  # no byte of an empty file can satisfy a range
+        return 'unsatisfiable'
+    if not first:  # suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return 'unsatisfiable'
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return 'unsatisfiable'
+    return start, end
+
+
+class MediaRequestHandler(BaseHTTPRequestHandler):
+    """
+    GET/HEAD for reference audio with single-range requests, strong ETags and long-lived
+    caching. File bodies go out with socket.sendfile (zero-copy os.sendfile where the
+    platform has it), so the server never holds a file in memory.
+    """
+
+    protocol_version = 'HTTP/1.1'
+    server_version = 'GitaGuruMedia/1.0'
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def _serve(self, send_body: bool):
+        path = resolve_media_path(urlsplit(self.path).path)
+        if path is None:
+            self._send_empty(HTTPStatus.NOT_FOUND)
+            return
+        size = os.path.getsize(path)
+        etag = file_etag(path)
+
+        if etag in [tag.strip() for tag in self.headers.get('If-None-Match', '').split(',')]:
+            self._send_empty(HTTPStatus.NOT_MODIFIED, etag)
+            return
+
+        byte_range = parse_range(self.headers.get('Range'), size)
+        if_range = self.headers.get('If-Range')
+        if byte_range is not None and if_range and if_range.strip() != etag:
+            byte_range = None  # the client's partial copy is stale: send the whole file
+        if byte_range == 'unsatisfiable':
+            self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+            self.send_header('Content-Range', f'bytes */{size}')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        start, end = byte_range or (0, size - 1)
+        length = end - start + 1 if size else 0
+        self.send_response(HTTPStatus.PARTIAL_CONTENT if byte_range else HTTPStatus.OK)
+        if byte_range:
+            self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        self.send_header('Content-Type', CONTENT_TYPES[os.path.splitext(path)[1].lower()])
+        self.send_header('Content-Length', str(length))
+        self.send_header('Last-Modified', formatdate(os.path.getmtime(path), usegmt=True))
+        self._send_cache_headers(etag)
+        self.end_headers()
+        if send_body and length:
+            self.wfile.flush()
+            with open(path, 'rb') as f:
+                self.connection.sendfile(f, offset=start, count=length)
+
+    def _send_cache_headers(self, etag):
+        self.send_header('ETag', etag)
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Cache-Control', f'public, max-age={LOCAL_MEDIA_MAX_AGE}, immutable')
+        self.send_header('Access-Control-Allow-Origin', '*')
+
+    def _send_empty(self, status, etag=None):
+        self.send_response(status)
+        if etag:
+            self._send_cache_headers(etag)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass  # one line per audio range request is too noisy
+
+
+def make_server(host: str = LOCAL_MEDIA_HOST, port: int = LOCAL_MEDIA_PORT):
+    server = ThreadingHTTPServer((host, port), MediaRequestHandler)
+    server.daemon_threads = True
+    return server
+
+
+# ---------------- URLs for the portal ----------------
+
+def local_media_url(path: str, base_url: str = LOCAL_MEDIA_BASE_URL):
+    """
+    URL of a file under one of MEDIA_ROOTS, versioned by its ETag so the long-lived
+    immutable caching stays correct when the file changes. None if it is not servable.
+    """
+    for prefix, root in MEDIA_ROOTS.items():
+        relative = os.path.relpath(os.path.abspath(path), root)
+        if not relative.startswith('..'):
+            if resolve_media_path(f"/{prefix}/{relative.replace(os.sep, '/')}") is None:
+                return None
+            version = file_etag(os.path.abspath(path)).strip('"')[:16]
+            return f"{base_url.rstrip('/')}/{prefix}/{quote(relative.replace(os.sep, '/'))}?v={version}"
+    return None
+
+
+def local_reference_audio(chapter_number, sloka: dict, max_kbps: int = None, mimes=UNIVERSAL_MIMES):
+    """
+    pick_reference_audio() over the files on this node: the verse's mp3 under slokas/ and
+    whatever renditions transcode_reference_audio.py left under renditions/. Like
+    reference_audio_for(), defaults to formats every browser plays.
+    Returns (url, mime) or (None, None) when the verse has no local audio.
+    """
+    sloka_number = str(sloka['sloka_number'])
+    original = local_media_url(os.path.join(MEDIA_ROOTS['slokas'], str(chapter_number), f"{sloka_number}.mp3"))
+    renditions = []
+    for spec in RENDITION_SPECS:
+        url = local_media_url(os.path.join(MEDIA_ROOTS['renditions'], str(chapter_number),
+                                           rendition_filename(sloka_number, spec)))
+        if url:
+            renditions.append({'bitrate_kbps': spec['bitrate_kbps'], 'mime': spec['mime'], 'url': url})
+    local = {'reference_audio_url': original, 'reference_audio_renditions': renditions}
+    url, mime = pick_reference_audio(local, max_kbps, mimes)
+    if url is None and renditions:
+        url, mime = pick_reference_audio(local, 0, mimes)  # no original mp3: smallest rendition
+    return url, mime
@@ -0,0 +1,95 @@
+import os
+import subprocess
+
+from config import REFERENCE_AUDIO_URL_STRATEGY
+
+# Renditions produced for every reference verse, smallest first
+RENDITION_SPECS = [
+    {'codec': 'opus', 'bitrate_kbps': 32, 'ext': 'opus', 'mime': 'audio/ogg'},
+    {'codec': 'opus', 'bitrate_kbps': 64, 'ext': 'opus', 'mime': 'audio/ogg'},
+    {'codec': 'aac', 'bitrate_kbps': 64, 'ext': 'm4a', 'mime': 'audio/mp4'},
+]
+
+FFMPEG_ENCODERS = {'opus': 'libopus', 'aac': 'aac'}
+
+# Formats every browser plays (Safari and all iOS browsers cannot play Ogg/Opus)
+UNIVERSAL_MIMES = ('audio/mp4', 'audio/mpeg')
+ALL_MIMES = tuple(sorted({spec['mime'] for spec in RENDITION_SPECS} | set(UNIVERSAL_MIMES)))
+
+
+def playable_mimes(user_agent: str):
+    """
+    Rendition mime types the client behind user_agent can play. WebKit outside
+    Chrome/Firefox/Edge (Safari, every iOS browser) and unknown clients get only
+    UNIVERSAL_MIMES.
+    """
+    ua = (user_agent or '').lower()
+    if not ua or 'iphone' in ua or 'ipad' in ua or 'ipod' in ua:
+        return UNIVERSAL_MIMES
+    if 'applewebkit' in ua and not any(engine in ua for engine in ('chrome/', 'chromium/', 'edg/', 'firefox/')):
+        return UNIVERSAL_MIMES
+    return ALL_MIMES
+
+
+def rendition_filename(sloka_number: str, spec: dict):
+    return f"{sloka_number}_{spec['codec']}{spec['bitrate_kbps']}k.{spec['ext']}"
+
+
+def ffmpeg_command(src: str, dst: str, spec: dict):
+    # Recitation is a single voice, so mono loses nothing and halves the bitrate need
+    command = ['ffmpeg', '-y', '-v', 'error', '-i', src, '-vn', '-ac', '1',
+               '-c:a', FFMPEG_ENCODERS[spec['codec']], '-b:a', f"{spec['bitrate_kbps']}k"]
+    if spec['codec'] == 'opus':
+        command += ['-application', 'voip']
+    return command + [dst]
+
+
+def transcode(src: str, dst: str, spec: dict):
+    """
+    Encode src into dst per spec, unless dst is already newer than src.
+    Runs in a worker process; returns (dst, size, transcoded).
+    """
+    if os.path.exists(dst) and os.path.getmtime(dst) >= os.path.getmtime(src):
+        return dst, os.path.getsize(dst), False
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    tmp_dst = f"{dst}.tmp.{spec['ext']}"
+    result = subprocess.run(ffmpeg_command(src, tmp_dst, spec), capture_output=True, text=True)
+    if result.returncode != 0:
+        if os.path.exists(tmp_dst):
+            os.remove(tmp_dst)
+        raise RuntimeError(result.stderr.strip() or f"ffmpeg exited with {result.returncode}")
+    os.replace(tmp_dst, dst)
+    return dst, os.path.getsize(dst), True
+
+
+def pick_reference_audio(sloka: dict, max_kbps: int = None, mimes=None):
+    """
+    Choose what the portal should stream for a sloka: the highest-bitrate rendition not above
+    max_kbps (the smallest one if none fits), limited to the given mime types.
+    max_kbps=None means the original reference_audio_url. Returns (url, mime) or (None, None).
+    """
+    original = sloka.get('reference_audio_url')
+    renditions = [r for r in (sloka.get('reference_audio_renditions') or [])
+                  if r.get('url') and (not mimes or r.get('mime') in mimes)]
+    if max_kbps is None or not renditions:
+        return (original, 'audio/mpeg') if original else (None, None)
+    renditions.sort(key=lambda r: r['bitrate_kbps'])
+    fitting = [r for r in renditions if r['bitrate_kbps'] <= max_kbps]
+    chosen = fitting[-1] if fitting else renditions[0]
+    return chosen['url'], chosen['mime']
+
+
+def reference_audio_for(chapter_number, sloka: dict, max_kbps: int = None, mimes=UNIVERSAL_MIMES,
+                        strategy: str = REFERENCE_AUDIO_URL_STRATEGY):
+    """
+    pick_reference_audio() under the configured URL strategy: with "local", files on this
+    node are served by the local media server, falling back to storage for verses that
+    have no local file. Pass playable_mimes() of the client for its preferred formats;
+    the default sticks to ones every browser plays.
+    """
+    if strategy == 'local':
+        from media.media_server import local_reference_audio
+        url, mime = local_reference_audio(chapter_number, sloka, max_kbps, mimes)
+        if url:
+            return url, mime
+    return pick_reference_audio(sloka, max_kbps, mimes)
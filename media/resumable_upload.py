@@ -0,0 +1,242 @@
+import base64
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+from urllib.parse import urljoin
+
+import httpx
+
+from media.retry import retry_with_backoff
+
+TUS_VERSION = '1.0.0'
+# Supabase Storage only accepts 6 MB chunks (the last one may be shorter)
+DEFAULT_CHUNK_SIZE = 6 * 1024 * 1024
+
+
+class UploadStateStore:
+    """
+    In-flight uploads: fingerprint -> {upload_url, object_name, offset, size}, one small JSON
+    file per upload under the directory `path` (kept in memory when path is None). Lets a
+    later process (or a later button press) resume where the last attempt stopped. Each
+    upload has its own file, written atomically, so concurrent uploader processes never
+    overwrite each other's entries.
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._states = {}
+        if path:
+            os.makedirs(path, exist_ok=True)
+
+    def _file(self, fingerprint: str):
+        return os.path.join(self.path, hashlib.sha256(fingerprint.encode('utf-8')).hexdigest() + '.json')
+
+    def get(self, fingerprint: str):
+        if not self.path:
+            with self._lock:
+                state = self._states.get(fingerprint)
+                return dict(state) if state else None
+        try:
+            with open(self._file(fingerprint), 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable upload state for {fingerprint}: {e}")
+            return None
+        return state if state.get('fingerprint') == fingerprint else None
+
+    def put(self, fingerprint: str, state: dict):
+        state = dict(state, fingerprint=fingerprint, updated_at=time.time())
+        if not self.path:
+            with self._lock:
+                self._states[fingerprint] = state
+            return
+        path = self._file(fingerprint)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def remove(self, fingerprint: str):
+        if not self.path:
+            with self._lock:
+                self._states.pop(fingerprint, None)
+            return
+        try:
+            os.remove(self._file(fingerprint))
+        except FileNotFoundError:
+            pass
+
+
+def _encode_metadata(metadata: dict):
+    return ','.join(f"{key} {base64.b64encode(str(value).encode('utf-8')).decode('ascii')}"
+                    for key, value in metadata.items())
+
+
+def _open_source(source):
+    """Return (seekable file object, size, should_close) for a path, bytes or file-like."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source), len(source), True
+    if isinstance(source, (str, os.PathLike)):
+        return open(source, 'rb'), os.path.getsize(source), True
+    position = source.tell()
+    source.seek(0, os.SEEK_END)
+    size = source.tell() - position
+    source.seek(position)
+    return source, size, False
+
+
+class UploadTooLargeError(ValueError):
+    pass
+
+
+class ResumableUploader:
+    """
+    Chunked, resumable uploads over the TUS protocol, as served by Supabase Storage at
+    {SUPABASE_URL}/storage/v1/upload/resumable. Each chunk is retried on transient errors;
+    after a failure the server offset is re-read so only the missing bytes are sent again.
+    Pass an httpx client with a custom transport (e.g. media.local_tus.LocalTusStorage)
+    to run against a local stand-in instead of Supabase.
+    """
+
+    def __init__(self, endpoint: str, api_key: str, http_client: httpx.Client = None,
+                 state_store: UploadStateStore = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 retries: int = 4):
+        self.endpoint = endpoint
+        self.api_key = api_key
+        self.http = http_client or httpx.Client(timeout=httpx.Timeout(60.0, connect=10.0))
+        self.state_store = state_store or UploadStateStore()
+        self.chunk_size = chunk_size
+        self.retries = retries
+
+    @classmethod
+    def for_supabase(cls, supabase_url: str, api_key: str, **kwargs):
+        return cls(f"{supabase_url.rstrip('/')}/storage/v1/upload/resumable", api_key, **kwargs)
+
+    def _headers(self, extra: dict = None):
+        headers = {
+            'authorization': f'Bearer {self.api_key}',
+            'apikey': self.api_key,
+            'Tus-Resumable': TUS_VERSION,
+        }
+        headers.update(extra or {})
+        return headers
+
+    def _create(self, bucket, object_name, size, content_type, upsert):
+        response = self.http.post(self.endpoint, headers=self._headers({
+            'Upload-Length': str(size),
+            'Upload-Metadata': _encode_metadata({
+                'bucketName': bucket,
+                'objectName': object_name,
+                'contentType': content_type,
+                'cacheControl': '3600',
+            }),
+            'x-upsert': 'true' if upsert else 'false',
+        }))
+        response.raise_for_status()
+        return urljoin(self.endpoint, response.headers['Location'])
+
+    def _server_offset(self, upload_url):
+        """Current offset of an upload, or None if the server no longer knows it."""
+        response = self.http.head(upload_url, headers=self._headers())
+        if response.status_code in (404, 410):
+            return None
+        response.raise_for_status()
+        return int(response.headers['Upload-Offset'])
+
+    def _patch(self, upload_url, offset, chunk):
+        response = self.http.patch(upload_url, content=chunk, headers=self._headers({
+            'Upload-Offset': str(offset),
+            'Content-Type': 'application/offset+octet-stream',
+        }))
+        response.raise_for_status()
+        return int(response.headers['Upload-Offset'])
+
+    def upload(self, source, bucket: str, object_name: str, content_type: str = 'application/octet-stream',
+               upsert: bool = True, fingerprint: str = None, on_progress=None, max_bytes: int = None):
+        """
+        Upload source (path, bytes or seekable file object) and return the object name
+        it was stored under. The source is read one chunk at a time, never as a whole.
+        When a saved state exists for `fingerprint` (by default the bucket, object name and
+        content hash) the earlier upload is resumed, and its original object name is
+        returned. on_progress(bytes_sent, total_bytes) is called after each chunk. With max_bytes set, larger sources are rejected before anything
+        is sent; since at most the announced size is ever read, the cap also bounds reads.
+        """
+        f, size, should_close = _open_source(source)
+        if max_bytes and size > max_bytes:
+            if should_close:
+                f.close()
+            raise UploadTooLargeError(f"{object_name} is {size} bytes, above the {max_bytes} byte limit")
+        start = f.tell()
+        try:
+            # Never key on name and size alone: a re-encoded file of the same size would resume
+            # the old partial upload and splice old and new bytes into one object
+            fingerprint = fingerprint or content_fingerprint(bucket, object_name, f)
+            state = self.state_store.get(fingerprint)
+            offset = None
+            if state and state.get('size') == size:
+                try:
+                    offset = self._server_offset(state['upload_url'])
+                except httpx.HTTPError:
+                    offset = None
+            if offset is None:
+                upload_url = retry_with_backoff(
+                    lambda: self._create(bucket, object_name, size, content_type, upsert), retries=self.retries
+                )
+                state = {'upload_url': upload_url, 'object_name': object_name, 'size': size}
+                offset = 0
+            state['offset'] = offset
+            self.state_store.put(fingerprint, state)
+
+            while offset < size:
+                f.seek(start + offset)
+                chunk = f.read(min(self.chunk_size, size - offset))
+                if not chunk:
+                    raise IOError(f"{object_name} ended at {offset} of {size} bytes")
+
+                def send(chunk_offset=offset, data=chunk):
+                    try:
+                        return self._patch(state['upload_url'], chunk_offset, data)
+                    except httpx.HTTPStatusError as e:
+                        # 409: our offset is stale; resync and let the loop resend from there
+                        if e.response.status_code == 409:
+                            return self._server_offset(state['upload_url'])
+                        raise
+
+                offset = retry_with_backoff(send, retries=self.retries)
+                if offset is None:
+                    raise RuntimeError(f"Upload for {state['object_name']} expired on the server")
+                state['offset'] = offset
+                self.state_store.put(fingerprint, state)
+                if on_progress:
+                    on_progress(offset, size)
+
+            self.state_store.remove(fingerprint)
+            return state['object_name']
+        finally:
+            if should_close:
+                f.close()
+
+
+def content_fingerprint(bucket: str, owner: str, source):
+    """
+    Fingerprint tied to content rather than object name, so re-submitting the same bytes
+    (bytes or a seekable file object) resumes the earlier upload.
+    """
+    digest = hashlib.sha256()
+    f, size, should_close = _open_source(source)
+    start = f.tell()
+    try:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    finally:
+        if should_close:
+            f.close()
+        else:
+            f.seek(start)
+    return f"{bucket}:{owner}:{digest.hexdigest()}:{size}"
@@ -0,0 +1,69 @@
+import errno
+import random
+import socket
+import sys
+import time
+
+# OSError errnos that mean the network, not the request, failed
+NETWORK_ERRNOS = {
+    errno.ECONNRESET, errno.ECONNREFUSED, errno.ECONNABORTED, errno.EPIPE, errno.ETIMEDOUT,
+    errno.EHOSTUNREACH, errno.ENETUNREACH, errno.ENETDOWN, errno.ENETRESET, errno.EAGAIN,
+}
+
+
+def status_code_of(exc):
+    """Best-effort HTTP status from supabase/storage3/httpx exceptions, or None."""
+    response = getattr(exc, 'response', None)
+    if response is not None and getattr(response, 'status_code', None):
+        return int(response.status_code)
+    status = getattr(exc, 'status', None)  # storage3 StorageApiError
+    if status:
+        try:
+            return int(status)
+        except (TypeError, ValueError):
+            pass
+    for arg in getattr(exc, 'args', ()):
+        if isinstance(arg, dict) and arg.get('statusCode'):
+            try:
+                return int(arg['statusCode'])
+            except (TypeError, ValueError):
+                return None
+    return None
+
+
+def is_network_error(exc):
+    """Connection failures and timeouts (httpx transport errors, socket errors), not local I/O or bad input."""
+    httpx = sys.modules.get('httpx')  # not imported means no httpx error can have been raised
+    if httpx is not None and isinstance(exc, httpx.TransportError):
+        return True
+    if isinstance(exc, (ConnectionError, TimeoutError, socket.timeout, socket.gaierror)):
+        return True
+    return isinstance(exc, OSError) and exc.errno in NETWORK_ERRNOS
+
+
+def is_transient_error(exc):
+    """Network errors, timeouts, 408/429 and 5xx are worth retrying; other 4xx and local errors are not."""
+    status = status_code_of(exc)
+    if status is None:
+        return is_network_error(exc)
+    return status in (408, 429) or status >= 500
+
+
+def retry_with_backoff(fn, retries: int = 3, base_delay: float = 0.5, max_delay: float = 8.0,
+                       retry_if=is_transient_error, on_retry=None):
+    """
+    Call fn() and retry up to `retries` more times with exponential backoff and full jitter.
+    on_retry(attempt, exc, delay) is called before each sleep. The last error is re-raised.
+    """
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except Exception as e:
+            if attempt >= retries or not retry_if(e):
+                raise
+            delay = random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+            attempt += 1
+            if on_retry:
+                on_retry(attempt, e, delay)
+            time.sleep(delay)
@@ -0,0 +1,207 @@
+import functools
+import shutil
+import subprocess
+
+import numpy as np
+
+from media.submission_audio import decode_wav, to_mono, resample
+
+# Feature extraction: 25 ms frames every 20 ms at speech rate, 12 MFCCs (c0, loudness, dropped)
+SCORING_SAMPLE_RATE = 16000
+FRAME_LENGTH = 400
+HOP_LENGTH = 320
+N_FFT = 512
+N_MELS = 40
+N_MFCC = 13
+# Sequences longer than this are average-pooled before alignment, bounding DTW time and
+# memory (a 60 s verse keeps 60 ms resolution, a 4 minute one 240 ms)
+MAX_FRAMES = 1000
+SEGMENT_SECONDS = 2.0
+
+
+def decode_audio(source, rate: int = SCORING_SAMPLE_RATE):
+    """
+    Decode any audio file (path or bytes: mp3, ogg/opus, m4a, wav) to float32 mono samples
+    at `rate` via ffmpeg. Without ffmpeg only WAV can be decoded.
+    """
+    data = bytes(source) if isinstance(source, (bytes, bytearray)) else None
+    if shutil.which('ffmpeg'):
+        result = subprocess.run(
+            ['ffmpeg', '-v', 'error', '-i', 'pipe:0' if data is not None else source,
+             '-vn', '-ac', '1', '-ar', str(rate), '-f', 's16le', 'pipe:1'],
+            input=data, capture_output=True,
+        )
+        if result.returncode != 0:
+            raise ValueError(f"Could not decode audio: {result.stderr.decode('utf-8', errors='replace').strip()}")
+        return np.frombuffer(result.stdout, dtype='<i2').astype(np.float32) / 32768.0
+    if data is None:
+        with open(source, 'rb') as f:
+            data = f.read()
+    samples, source_rate = decode_wav(data)
+    return resample(to_mono(samples), source_rate, rate)
+
+
+@functools.lru_cache(maxsize=4)
+def mel_filterbank(rate: int = SCORING_SAMPLE_RATE, n_fft: int = N_FFT, n_mels: int = N_MELS):
+    """Triangular mel filters, shape (n_mels, n_fft // 2 + 1)."""
+    mels = np.linspace(0.0, 2595.0 * np.log10(1.0 + (rate / 2.0) / 700.0), n_mels + 2)
+    bins = np.floor((n_fft + 1) * (700.0 * (10.0 ** (mels / 2595.0) - 1.0)) / rate)
+    lower, center, upper = bins[:-2, None], bins[1:-1, None], bins[2:, None]
+    freqs = np.arange(n_fft // 2 + 1)[None, :]
+    rising = (freqs - lower) / np.maximum(center - lower, 1.0)
+    falling = (upper - freqs) / np.maximum(upper - center, 1.0)
+    return np.maximum(0.0, np.minimum(rising, falling)).astype(np.float32)
+
+
+@functools.lru_cache(maxsize=4)
+def dct_matrix(n_mfcc: int = N_MFCC, n_mels: int = N_MELS):
+    """Orthonormal DCT-II basis, shape (n_mfcc, n_mels)."""
+    n = np.arange(n_mels)[None, :]
+    k = np.arange(n_mfcc)[:, None]
+    basis = np.cos(np.pi / n_mels * (n + 0.5) * k) * np.sqrt(2.0 / n_mels)
+    basis[0] /= np.sqrt(2.0)
+    return basis.astype(np.float32)
+
+
+def mfcc(samples: np.ndarray, rate: int = SCORING_SAMPLE_RATE):
+    """
+    MFCCs of mono samples, shape (frames, N_MFCC - 1), computed for all frames at once.
+    c0 is dropped and the per-utterance mean removed, so loudness and microphone
+    coloration do not count as differences.
+    """
+    if len(samples) < FRAME_LENGTH:
+        samples = np.pad(samples, (0, FRAME_LENGTH - len(samples)))
+    frames = np.lib.stride_tricks.sliding_window_view(samples, FRAME_LENGTH)[::HOP_LENGTH]
+    spectrum = np.abs(np.fft.rfft(frames * np.hamming(FRAME_LENGTH).astype(np.float32), n=N_FFT)) ** 2
+    log_mel = np.log(spectrum.astype(np.float32) @ mel_filterbank(rate).T + 1e-10)
+    coefficients = log_mel @ dct_matrix().T
+    coefficients = coefficients[:, 1:]
+    return coefficients - coefficients.mean(axis=0)
+
+
+def prepare_features(samples: np.ndarray, rate: int = SCORING_SAMPLE_RATE, max_frames: int = MAX_FRAMES):
+    """
+    Alignment-ready features of a recording: MFCC frames average-pooled down to at most
+    max_frames and scaled to unit length (so a dot product is cosine similarity).
+    Returns {'features', 'frame_s', 'duration_s'}.
+    """
+    return pool_features(mfcc(samples, rate), HOP_LENGTH / float(rate), len(samples) / float(rate), max_frames)
+
+
+def pool_features(features: np.ndarray, frame_s: float, duration_s: float, max_frames: int = MAX_FRAMES):
+    """Average-pool raw feature frames to at most max_frames and unit-normalize them."""
+    factor = int(np.ceil(len(features) / float(max_frames))) if len(features) > max_frames else 1
+    if factor > 1:
+        starts = np.arange(0, len(features), factor)
+        counts = np.diff(np.append(starts, len(features)))[:, None]
+        features = np.add.reduceat(features, starts, axis=0) / counts
+    norms = np.linalg.norm(features, axis=1, keepdims=True)
+    return {
+        'features': (features / np.maximum(norms, 1e-8)).astype(np.float32),
+        'frame_s': frame_s * factor,
+        'duration_s': duration_s,
+    }
+
+
+def dtw_batch(queries: list, references: list):
+    """
+    Cosine-distance DTW of each query against its reference, all pairs at once: the
+    accumulated-cost matrix is filled one anti-diagonal at a time, vectorized over the
+    diagonal and over the batch (shorter pairs are padded; padding never feeds back into
+    a pair's own cells). Returns [(path as (k, 2) array of (query, reference) frames,
+    per-step costs)].
+    """
+    batch = len(queries)
+    n = max(len(q) for q in queries)
+    m = max(len(r) for r in references)
+    dims = queries[0].shape[1]
+    q = np.zeros((batch, n, dims), dtype=np.float32)
+    r = np.zeros((batch, m, dims), dtype=np.float32)
+    for b, (query, reference) in enumerate(zip(queries, references)):
+        q[b, :len(query)] = query
+        r[b, :len(reference)] = reference
+    cost = np.clip(1.0 - np.einsum('bnd,bmd->bnm', q, r), 0.0, 2.0)
+
+    acc = np.full((batch, n + 1, m + 1), np.inf, dtype=np.float32)
+    acc[:, 0, 0] = 0.0
+    steps = np.zeros((batch, n, m), dtype=np.int8)  # 0 diagonal, 1 from above (query), 2 from left (reference)
+    for k in range(2, n + m + 1):
+        i = np.arange(max(1, k - m), min(n, k - 1) + 1)
+        j = k - i
+        candidates = np.stack([acc[:, i - 1, j - 1], acc[:, i - 1, j], acc[:, i, j - 1]])
+        best = candidates.argmin(axis=0)
+        acc[:, i, j] = cost[:, i - 1, j - 1] + np.take_along_axis(candidates, best[None], axis=0)[0]
+        steps[:, i - 1, j - 1] = best
+
+    results = []
+    for b, (query, reference) in enumerate(zip(queries, references)):
+        i, j = len(query), len(reference)
+        path = []
+        while i > 0 and j > 0:
+            path.append((i - 1, j - 1))
+            step = steps[b, i - 1, j - 1]
+            if step == 0:
+                i, j = i - 1, j - 1
+            elif step == 1:
+                i -= 1
+            else:
+                j -= 1
+        path = np.array(path[::-1], dtype=np.int64)
+        results.append((path, cost[b, path[:, 0], path[:, 1]]))
+    return results
+
+
+def timing_segments(path: np.ndarray, step_costs: np.ndarray, query: dict, reference: dict,
+                    segment_s: float = SEGMENT_SECONDS):
+    """
+    Split the reference into segment_s pieces and report where the recitation covered each
+    one: its span in the recitation, the offset from where a recitation at the overall
+    tempo would be, the local tempo, and the mean alignment cost (high = mismatch).
+    """
+    tempo = query['duration_s'] / reference['duration_s'] if reference['duration_s'] else 1.0
+    segment_frames = max(1, int(round(segment_s / reference['frame_s'])))
+    bounds = np.searchsorted(path[:, 1], np.arange(0, path[-1, 1] + 1 + segment_frames, segment_frames))
+    segments = []
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        if start >= end:
+            continue
+        ref_start = path[start, 1] * reference['frame_s']
+        ref_end = (path[end - 1, 1] + 1) * reference['frame_s']
+        sub_start = path[start:end, 0].min() * query['frame_s']
+        sub_end = (path[start:end, 0].max() + 1) * query['frame_s']
+        segments.append({
+            'ref_start_s': round(float(ref_start), 2),
+            'ref_end_s': round(float(ref_end), 2),
+            'start_s': round(float(sub_start), 2),
+            'end_s': round(float(sub_end), 2),
+            'offset_s': round(float(sub_start - ref_start * tempo), 2),
+            'tempo_ratio': round(float((sub_end - sub_start) / (ref_end - ref_start)), 3),
+            'cost': round(float(step_costs[start:end].mean()), 3),
+        })
+    return segments
+
+
+def score_batch(queries: list, references: list, segment_s: float = SEGMENT_SECONDS):
+    """
+    Score recitations against references (both lists of prepare_features() results, paired
+    by position). Each result has 'score' (0-1, higher = closer to the reference), the mean
+    alignment 'distance', overall 'tempo_ratio' and per-segment timing in 'segments'.
+    """
+    alignments = dtw_batch([q['features'] for q in queries], [r['features'] for r in references])
+    results = []
+    for (path, step_costs), query, reference in zip(alignments, queries, references):
+        distance = float(step_costs.mean())
+        results.append({
+            'score': round(float(np.clip(1.0 - distance, 0.0, 1.0)), 3),
+            'distance': round(distance, 4),
+            'duration_s': round(query['duration_s'], 2),
+            'reference_duration_s': round(reference['duration_s'], 2),
+            'tempo_ratio': round(query['duration_s'] / reference['duration_s'], 3) if reference['duration_s'] else None,
+            'segments': timing_segments(path, step_costs, query, reference, segment_s),
+        })
+    return results
+
+
+def score_recitation(recitation: np.ndarray, reference: np.ndarray, rate: int = SCORING_SAMPLE_RATE):
+    """Score one recitation against its reference, both as mono samples at `rate`."""
+    return score_batch([prepare_features(recitation, rate)], [prepare_features(reference, rate)])[0]
@@ -0,0 +1,379 @@
+import io
+import json
+import shutil
+import subprocess
+import tempfile
+import wave
+
+import numpy as np
+
+from config import (SUBMISSION_SAMPLE_RATE, SUBMISSION_OPUS_BITRATE, SUBMISSION_AAC_BITRATE, SUBMISSION_SPOOL_BYTES,
+                    SUBMISSION_TRIM_SILENCE)
+from media.vad import trim_silence
+
+
+def wav_info(source):
+    """
+    Duration, sample rate, channel count and size of a WAV (bytes or seekable file object),
+    read from its header without decoding the samples.
+    """
+    f = io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+    start = f.tell()
+    try:
+        with wave.open(f, 'rb') as wf:
+            rate = wf.getframerate()
+            frames = wf.getnframes()
+            channels = wf.getnchannels()
+        size = _file_size(f)
+    finally:
+        f.seek(start)
+    return {
+        'duration_s': round(frames / float(rate), 3) if rate else 0.0,
+        'sample_rate': rate,
+        'channels': channels,
+        'codec': 'pcm',
+        'bytes': size,
+    }
+
+
+def ffprobe_info(source):
+    """Same fields as wav_info for any format ffprobe understands; None without ffprobe."""
+    if not shutil.which('ffprobe'):
+        return None
+    command = ['ffprobe', '-v', 'error', '-select_streams', 'a:0', '-show_entries',
+               'stream=codec_name,sample_rate,channels:format=duration', '-of', 'json', '-i', 'pipe:0']
+    if isinstance(source, (bytes, bytearray)):
+        size = len(source)
+        result = subprocess.run(command, input=bytes(source), capture_output=True)
+    else:
+        # File objects are streamed to ffprobe, never read into memory: a real file is handed
+        # over as stdin directly, anything else (BytesIO, UploadedFile) is spooled to disk first
+        start = source.tell()
+        size = _file_size(source) - start
+        try:
+            try:
+                source.fileno()
+                source.seek(start)
+                stdin, spooled = source, None
+            except (AttributeError, OSError, io.UnsupportedOperation):
+                source.seek(start)
+                spooled = tempfile.TemporaryFile()
+                shutil.copyfileobj(source, spooled, 1024 * 1024)
+                spooled.seek(0)
+                stdin = spooled
+            try:
+                result = subprocess.run(command, stdin=stdin, capture_output=True)
+            finally:
+                if spooled is not None:
+                    spooled.close()
+        finally:
+            source.seek(start)
+    if result.returncode != 0:
+        return None
+    probed = json.loads(result.stdout or b'{}')
+    stream = (probed.get('streams') or [{}])[0]
+    duration = probed.get('format', {}).get('duration')
+    return {
+        'duration_s': round(float(duration), 3) if duration else None,
+        'sample_rate': int(stream['sample_rate']) if stream.get('sample_rate') else None,
+        'channels': stream.get('channels'),
+        'codec': stream.get('codec_name'),
+        'bytes': size,
+    }
+
+
+def probe_audio(source, name: str = None):
+    """
+    Audio details for a recording or upload (bytes or seekable file object), computed once
+    when it is captured so the UI never has to reopen the audio: the WAV header when it
+    parses, otherwise ffprobe, otherwise just the size.
+    """
+    if name is None or name.lower().endswith('.wav'):
+        try:
+            return wav_info(source)
+        except (wave.Error, EOFError):
+            pass
+    info = ffprobe_info(source)
+    if info:
+        return info
+    size = len(source) if isinstance(source, (bytes, bytearray)) else _file_size(source)
+    return {'duration_s': None, 'sample_rate': None, 'channels': None, 'codec': None, 'bytes': size}
+
+
+def format_duration(seconds):
+    if seconds is None:
+        return "--:--"
+    secs = int(seconds)
+    return f"{secs // 60:02d}:{secs % 60:02d}"
+
+
+def describe_audio(info: dict):
+    """
+    One-line summary such as '01:23 · 16 kHz · mono · 180 KB' from stored audio metadata,
+    with the original length and speech time when silence was trimmed.
+    """
+    parts = [format_duration(info.get('duration_s'))]
+    untrimmed = info.get('untrimmed_duration_s')
+    if untrimmed and info.get('duration_s') is not None and untrimmed - info['duration_s'] >= 0.5:
+        parts[0] += f" (trimmed from {format_duration(untrimmed)}, {format_duration(info.get('speech_s'))} speech)"
+    if info.get('sample_rate'):
+        parts.append(f"{info['sample_rate'] / 1000:g} kHz")
+    if info.get('channels'):
+        parts.append({1: 'mono', 2: 'stereo'}.get(info['channels'], f"{info['channels']} ch"))
+    if info.get('bytes'):
+        parts.append(f"{info['bytes'] / 1024:.0f} KB" if info['bytes'] < 1024 * 1024
+                     else f"{info['bytes'] / (1024 * 1024):.1f} MB")
+    return " · ".join(parts)
+
+
+def _frames_to_float(raw: bytes, width: int, channels: int):
+    """Interleaved PCM bytes -> float32 samples in [-1, 1] shaped (frames, channels)."""
+    if width == 1:
+        samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif width == 2:
+        samples = np.frombuffer(raw, dtype='<i2').astype(np.float32) / 32768.0
+    elif width == 3:
+        b = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        ints = b[:, 0] | (b[:, 1] << 8) | (b[:, 2] << 16)
+        ints = np.where(ints >= 1 << 23, ints - (1 << 24), ints)
+        samples = ints.astype(np.float32) / float(1 << 23)
+    elif width == 4:
+        samples = np.frombuffer(raw, dtype='<i4').astype(np.float32) / float(1 << 31)
+    else:
+        raise ValueError(f"Unsupported WAV sample width: {width} bytes")
+    return samples.reshape(-1, channels)
+
+
+def decode_wav(data: bytes):
+    """Decode WAV bytes to (float32 samples in [-1, 1] shaped (frames, channels), sample_rate)."""
+    with wave.open(io.BytesIO(data), 'rb') as wf:
+        channels = wf.getnchannels()
+        width = wf.getsampwidth()
+        rate = wf.getframerate()
+        raw = wf.readframes(wf.getnframes())
+    return _frames_to_float(raw, width, channels), rate
+
+
+def to_mono(samples: np.ndarray):
+    return samples.mean(axis=1) if samples.ndim == 2 else samples
+
+
+def resample(samples: np.ndarray, rate: int, target_rate: int):
+    """Linear-interpolation resampler with a box low-pass first when downsampling."""
+    if rate == target_rate or len(samples) == 0:
+        return samples
+    if target_rate < rate:
+        width = int(np.ceil(rate / target_rate))
+        if width > 1:
+            samples = np.convolve(samples, np.ones(width, dtype=np.float32) / width, mode='same')
+    duration = len(samples) / float(rate)
+    target_len = max(1, int(round(duration * target_rate)))
+    positions = np.arange(target_len, dtype=np.float64) * (rate / float(target_rate))
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+def encode_wav(samples: np.ndarray, rate: int):
+    """Mono float samples -> 16-bit PCM WAV bytes."""
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767.0).astype('<i2')
+    buf = io.BytesIO()
+    with wave.open(buf, 'wb') as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(rate)
+        wf.writeframes(pcm.tobytes())
+    return buf.getvalue()
+
+
+class StreamingResampler:
+    """
+    Block-by-block equivalent of resample(): a causal box low-pass followed by linear
+    interpolation, carrying filter and interpolation state across blocks so memory stays
+    bounded by the block size however long the recording is.
+    """
+
+    def __init__(self, rate: int, target_rate: int):
+        self.ratio = rate / float(target_rate)
+        width = int(np.ceil(rate / target_rate)) if target_rate < rate else 1
+        self.kernel = np.ones(width, dtype=np.float32) / width
+        self.filter_tail = np.zeros(width - 1, dtype=np.float32)
+        self.prev = np.zeros(0, dtype=np.float32)  # last input sample of the previous block
+        self.base = 0  # global index of self.prev[0] (or of the next block when prev is empty)
+        self.next_out = 0
+
+    def process(self, block: np.ndarray):
+        if len(self.kernel) > 1:
+            padded = np.concatenate([self.filter_tail, block])
+            self.filter_tail = padded[len(padded) - (len(self.kernel) - 1):]
+            block = np.convolve(padded, self.kernel, mode='valid').astype(np.float32)
+        buffer = np.concatenate([self.prev, block])
+        if len(buffer) == 0:
+            return buffer
+        last = self.base + len(buffer) - 1
+        k_max = int(np.floor(last / self.ratio))
+        ks = np.arange(self.next_out, k_max + 1, dtype=np.float64)
+        out = np.interp(ks * self.ratio - self.base, np.arange(len(buffer)), buffer).astype(np.float32)
+        self.next_out = k_max + 1
+        self.base = last
+        self.prev = buffer[-1:]
+        return out
+
+
+class AudioTooLargeError(ValueError):
+    pass
+
+
+def _spooled():
+    return tempfile.SpooledTemporaryFile(max_size=SUBMISSION_SPOOL_BYTES)
+
+
+def normalize_wav_stream(source, target_rate: int = SUBMISSION_SAMPLE_RATE, max_bytes: int = None,
+                         block_frames: int = 1 << 16):
+    """
+    Downmix and resample a WAV (bytes or file object) block by block into a 16-bit mono WAV
+    held in a spooled temp file. Returns (file positioned at 0, info) where info has the
+    stored rate/frames and the original rate/channels.
+    """
+    f = io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+    with wave.open(f, 'rb') as wf:
+        channels = wf.getnchannels()
+        width = wf.getsampwidth()
+        rate = wf.getframerate()
+        if max_bytes and wf.getnframes() * channels * width > max_bytes:
+            raise AudioTooLargeError(f"Audio is larger than the {max_bytes // (1024 * 1024)} MB limit")
+        out_rate = min(rate, target_rate)
+        resampler = StreamingResampler(rate, out_rate)
+        out = _spooled()
+        frames_out = 0
+        with wave.open(out, 'wb') as wo:
+            wo.setnchannels(1)
+            wo.setsampwidth(2)
+            wo.setframerate(out_rate)
+            while True:
+                raw = wf.readframes(block_frames)
+                if not raw:
+                    break
+                mono = to_mono(_frames_to_float(raw, width, channels))
+                resampled = resampler.process(mono) if out_rate != rate else mono
+                wo.writeframes((np.clip(resampled, -1.0, 1.0) * 32767.0).astype('<i2').tobytes())
+                frames_out += len(resampled)
+    out.seek(0)
+    return out, {'frames': frames_out, 'sample_rate': out_rate,
+                 'original_sample_rate': rate, 'original_channels': channels}
+
+
+def _ffmpeg_encode(wav_file, output_args: list, name: str):
+    """
+    WAV file object -> spooled temp file encoded by ffmpeg with output_args, streaming
+    through temp files rather than pipes held in memory. None when ffmpeg is missing or fails.
+    """
+    if not shutil.which('ffmpeg'):
+        return None
+    if hasattr(wav_file, 'rollover'):
+        wav_file.rollover()  # ffmpeg needs a real file descriptor
+    wav_file.seek(0)
+    out = tempfile.TemporaryFile()
+    # bitexact keeps container headers fixed, so the same recording always encodes to the same
+    # bytes and a retried submission can resume its earlier upload
+    result = subprocess.run(
+        ['ffmpeg', '-v', 'error', '-f', 'wav', '-i', 'pipe:0', *output_args,
+         '-fflags', '+bitexact', '-flags:a', '+bitexact', 'pipe:1'],
+        stdin=wav_file, stdout=out, stderr=subprocess.PIPE,
+    )
+    wav_file.seek(0)
+    if result.returncode != 0 or out.tell() == 0:
+        print(f"{name} encoding failed: {result.stderr.decode('utf-8', errors='replace').strip()}")
+        out.close()
+        return None
+    out.seek(0)
+    return out
+
+
+def encode_opus(wav_file, bitrate: str = SUBMISSION_OPUS_BITRATE):
+    """WAV file object -> Ogg/Opus temp file, or None when ffmpeg is missing or fails."""
+    return _ffmpeg_encode(wav_file, ['-c:a', 'libopus', '-b:a', bitrate, '-application', 'voip', '-f', 'ogg'], 'Opus')
+
+
+def encode_aac(wav_file, bitrate: str = SUBMISSION_AAC_BITRATE):
+    """
+    WAV file object -> AAC in MP4 temp file, or None when ffmpeg is missing or fails.
+    Fragmented, because a plain MP4 needs a seekable output to write its index.
+    """
+    return _ffmpeg_encode(wav_file, ['-c:a', 'aac', '-b:a', bitrate,
+                                     '-movflags', 'frag_keyframe+empty_moov', '-f', 'mp4'], 'AAC')
+
+
+def playable_submission_url(url: str, info: dict, mimes):
+    """
+    The stored submission audio at url, or one of its renditions when the client (see
+    media.renditions.playable_mimes) cannot play the original, e.g. Opus on Safari/iOS.
+    """
+    info = info or {}
+    mime = info.get('mime') or ('audio/ogg' if info.get('codec') == 'opus' else None)
+    if not mime or mime in mimes:
+        return url
+    for rendition in info.get('renditions') or []:
+        if rendition.get('url') and rendition.get('mime') in mimes:
+            return rendition['url']
+    return url
+
+
+def _file_size(f):
+    f.seek(0, io.SEEK_END)
+    size = f.tell()
+    f.seek(0)
+    return size
+
+
+def prepare_submission_audio(source, target_rate: int = SUBMISSION_SAMPLE_RATE, max_bytes: int = None,
+                             trim: bool = SUBMISSION_TRIM_SILENCE):
+    """
+    Normalize a recorded or uploaded WAV (bytes or file object) before storage: downmix to
+    mono, resample to speech rate, cut leading/trailing silence (media/vad.py) and encode as
+    Opus (16-bit mono WAV when ffmpeg is unavailable). Opus comes with an AAC rendition for
+    clients that cannot play it. Processing is streamed, so memory does not grow with the
+    recording length.
+    Returns {'file', 'size', 'ext', 'mime', 'metadata', 'renditions'}, each rendition a
+    {'file', 'size', 'ext', 'mime'}; the caller closes every 'file'.
+    """
+    original_bytes = len(source) if isinstance(source, (bytes, bytearray)) else _file_size(source)
+    if max_bytes and original_bytes > max_bytes:
+        raise AudioTooLargeError(f"Audio is larger than the {max_bytes // (1024 * 1024)} MB limit")
+    wav_file, info = normalize_wav_stream(source, target_rate, max_bytes=max_bytes)
+    speech = {}
+    if trim:
+        wav_file, speech = trim_silence(wav_file)
+        with wave.open(wav_file, 'rb') as wf:
+            info['frames'] = wf.getnframes()
+        wav_file.seek(0)
+
+    encoded = encode_opus(wav_file)
+    renditions = []
+    if encoded:
+        fallback = encode_aac(wav_file)
+        if fallback:
+            renditions.append({'file': fallback, 'size': _file_size(fallback), 'ext': '.m4a', 'mime': 'audio/mp4'})
+        wav_file.close()
+        payload, ext, mime, codec = encoded, '.ogg', 'audio/ogg', 'opus'
+    else:
+        payload, ext, mime, codec = wav_file, '.wav', 'audio/wav', 'pcm_s16le'
+    size = _file_size(payload)
+
+    return {
+        'file': payload,
+        'size': size,
+        'ext': ext,
+        'mime': mime,
+        'metadata': {
+            'duration_s': round(info['frames'] / float(info['sample_rate']), 3) if info['sample_rate'] else 0.0,
+            'sample_rate': info['sample_rate'],
+            'channels': 1,
+            'codec': codec,
+            'mime': mime,
+            'bytes': size,
+            'original_bytes': original_bytes,
+            'original_sample_rate': info['original_sample_rate'],
+            'original_channels': info['original_channels'],
+            **speech,
+        },
+        'renditions': renditions,
+    }
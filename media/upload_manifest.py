@@ -0,0 +1,81 @@
+import hashlib
+import json
+import os
+import time
+
+
+def sha256_of_file(path: str, chunk_size: int = 1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class UploadManifest:
+    """
+    Local record of what has been uploaded where: path -> size, mtime, sha256, remote path.
+    Files whose size and mtime are unchanged are trusted without hashing; otherwise the
+    content hash decides whether an upload is needed. The manifest is bound to one
+    storage target (Supabase URL + bucket) so a new environment starts from scratch.
+    """
+
+    def __init__(self, path: str, target: str):
+        self.path = path
+        self.target = target
+        self.entries = {}
+        self.dirty = False
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('target') == target:
+                    self.entries = data.get('files', {})
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable upload manifest {path}: {e}")
+
+    @staticmethod
+    def _key(local_path: str):
+        return os.path.normpath(local_path).replace(os.sep, '/')
+
+    def check(self, local_path: str, remote_path: str):
+        """
+        Return (needs_upload, sha256). sha256 is None when the file was trusted from
+        its size/mtime and so was never read.
+        """
+        stat = os.stat(local_path)
+        entry = self.entries.get(self._key(local_path))
+        if entry and entry.get('remote_path') == remote_path:
+            if entry.get('size') == stat.st_size and entry.get('mtime_ns') == stat.st_mtime_ns:
+                return False, None
+        sha256 = sha256_of_file(local_path)
+        if entry and entry.get('remote_path') == remote_path and entry.get('sha256') == sha256:
+            # Touched but identical: refresh the stat fields so the next run skips hashing
+            entry.update(size=stat.st_size, mtime_ns=stat.st_mtime_ns)
+            self.dirty = True
+            return False, sha256
+        return True, sha256
+
+    def get(self, local_path: str):
+        return self.entries.get(self._key(local_path))
+
+    def record(self, local_path: str, remote_path: str, sha256: str = None, public_url: str = None):
+        stat = os.stat(local_path)
+        self.entries[self._key(local_path)] = {
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha256': sha256 or sha256_of_file(local_path),
+            'remote_path': remote_path,
+            'public_url': public_url,
+            'uploaded_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        }
+        self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'target': self.target, 'files': self.entries}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
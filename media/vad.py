@@ -0,0 +1,124 @@
+import tempfile
+import wave
+
+import numpy as np
+
+from config import (SUBMISSION_SPOOL_BYTES, SUBMISSION_VAD_PADDING_S, SUBMISSION_VAD_MIN_SILENCE_S,
+                    SUBMISSION_VAD_MIN_SPEECH_S)
+
+FRAME_S = 0.02
+# A frame is speech when it is this far above the recording's noise floor (its 10th
+# percentile energy), or half as far with a high zero-crossing rate (unvoiced consonants)
+SPEECH_MARGIN_DB = 12.0
+UNVOICED_ZCR = 0.25
+# Quieter than this is silence whatever the noise floor (digital silence, muted mic)
+ABSOLUTE_FLOOR_DB = -60.0
+
+
+def frame_features(samples: np.ndarray, frame: int):
+    """Per-frame log energy (dBFS) and zero-crossing rate of mono samples, all frames at once."""
+    frames = samples[:len(samples) // frame * frame].reshape(-1, frame)
+    energy_db = 10.0 * np.log10(np.mean(frames.astype(np.float32) ** 2, axis=1) + 1e-12)
+    signs = np.signbit(frames)
+    zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+    return energy_db, zcr
+
+
+def speech_mask(energy_db: np.ndarray, zcr: np.ndarray):
+    """Boolean speech/non-speech decision per frame, thresholded against the recording's own noise floor."""
+    if len(energy_db) == 0:
+        return np.zeros(0, dtype=bool)
+    floor = np.percentile(energy_db, 10)
+    voiced = energy_db > floor + SPEECH_MARGIN_DB
+    unvoiced = (energy_db > floor + SPEECH_MARGIN_DB / 2) & (zcr > UNVOICED_ZCR)
+    return (voiced | unvoiced) & (energy_db > ABSOLUTE_FLOOR_DB)
+
+
+def mask_to_segments(mask: np.ndarray, frame_s: float = FRAME_S,
+                     min_silence_s: float = SUBMISSION_VAD_MIN_SILENCE_S,
+                     min_speech_s: float = SUBMISSION_VAD_MIN_SPEECH_S):
+    """
+    [[start_s, end_s], ...] of speech from a per-frame mask: pauses shorter than
+    min_silence_s are bridged, then bursts shorter than min_speech_s (clicks, bumps) dropped.
+    """
+    edges = np.diff(np.concatenate([[0], mask.astype(np.int8), [0]]))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    if len(starts) == 0:
+        return []
+    keep = np.concatenate([[True], (starts[1:] - ends[:-1]) * frame_s >= min_silence_s])
+    starts = starts[keep]
+    ends = np.concatenate([ends[:-1][keep[1:]], ends[-1:]])
+    long_enough = (ends - starts) * frame_s >= min_speech_s
+    return [[round(float(s * frame_s), 2), round(float(e * frame_s), 2)]
+            for s, e in zip(starts[long_enough], ends[long_enough])]
+
+
+def detect_speech(wav_file, block_frames: int = 1 << 16):
+    """
+    Speech segments of a 16-bit mono WAV file object, read block by block (memory holds one
+    block plus two numbers per 20 ms frame). Returns (segments, duration_s); the file is
+    rewound.
+    """
+    wav_file.seek(0)
+    energies, zcrs = [], []
+    with wave.open(wav_file, 'rb') as wf:
+        rate = wf.getframerate()
+        total = wf.getnframes()
+        frame = max(1, int(rate * FRAME_S))
+        block = max(frame, block_frames // frame * frame)
+        while True:
+            raw = wf.readframes(block)
+            if not raw:
+                break
+            samples = np.frombuffer(raw, dtype='<i2').astype(np.float32) / 32768.0
+            energy_db, zcr = frame_features(samples, frame)
+            energies.append(energy_db)
+            zcrs.append(zcr)
+    wav_file.seek(0)
+    energy_db = np.concatenate(energies) if energies else np.zeros(0, dtype=np.float32)
+    zcr = np.concatenate(zcrs) if zcrs else np.zeros(0, dtype=np.float32)
+    duration_s = total / float(rate) if rate else 0.0
+    return mask_to_segments(speech_mask(energy_db, zcr), frame / float(rate) if rate else FRAME_S), duration_s
+
+
+def trim_wav(wav_file, start_s: float, end_s: float, block_frames: int = 1 << 16):
+    """Copy [start_s, end_s) of a WAV file object into a new spooled WAV, block by block."""
+    wav_file.seek(0)
+    out = tempfile.SpooledTemporaryFile(max_size=SUBMISSION_SPOOL_BYTES)
+    with wave.open(wav_file, 'rb') as wf, wave.open(out, 'wb') as wo:
+        wo.setparams(wf.getparams())
+        rate = wf.getframerate()
+        start = min(wf.getnframes(), int(start_s * rate))
+        remaining = min(wf.getnframes(), int(np.ceil(end_s * rate))) - start
+        wf.setpos(start)
+        while remaining > 0:
+            raw = wf.readframes(min(block_frames, remaining))
+            if not raw:
+                break
+            wo.writeframes(raw)
+            remaining -= len(raw) // (wf.getsampwidth() * wf.getnchannels())
+    out.seek(0)
+    return out
+
+
+def trim_silence(wav_file, padding_s: float = SUBMISSION_VAD_PADDING_S):
+    """
+    Cut leading and trailing silence from a 16-bit mono WAV file object, keeping padding_s
+    around the speech. Returns (file, info): the original file (rewound) when there is
+    nothing to cut or no speech at all, else a new one and the original is closed. info has
+    'speech_segments' relative to the returned file, 'speech_s' and 'untrimmed_duration_s'.
+    """
+    segments, duration_s = detect_speech(wav_file)
+    info = {'speech_segments': segments, 'speech_s': round(sum(e - s for s, e in segments), 2),
+            'untrimmed_duration_s': round(duration_s, 3)}
+    if not segments:
+        return wav_file, info
+    start = max(0.0, segments[0][0] - padding_s)
+    end = min(duration_s, segments[-1][1] + padding_s)
+    if start <= 0.0 and end >= duration_s:
+        return wav_file, info
+    trimmed = trim_wav(wav_file, start, end)
+    wav_file.close()
+    info['speech_segments'] = [[round(s - start, 2), round(e - start, 2)] for s, e in segments]
+    return trimmed, info
@@ -0,0 +1,66 @@
+import os
+import sys
+import glob
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import DATABASE_URL
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "database", "migrations")
+
+def list_migrations(migrations_dir=MIGRATIONS_DIR):
+    """[(version, path)] sorted by version, where version is the file name without .sql"""
+    paths = sorted(glob.glob(os.path.join(migrations_dir, "*.sql")))
+    return [(os.path.splitext(os.path.basename(path))[0], path) for path in paths]
+
+def apply_migrations(database_url=DATABASE_URL, dry_run=False):
+    """Apply every migration not yet recorded in schema_migrations, each in its own transaction"""
+    try:
+        import psycopg2
+    except ImportError:
+        print("❌ psycopg2 is required: pip install psycopg2-binary")
+        return False
+
+    if not database_url:
+        print("❌ DATABASE_URL is not set (Supabase: Settings > Database > Connection string).")
+        return False
+
+    conn = psycopg2.connect(database_url)
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute("""
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version TEXT PRIMARY KEY,
+                    applied_at TIMESTAMPTZ DEFAULT now()
+                )
+            """)
+            cur.execute("SELECT version FROM schema_migrations")
+            applied = {row[0] for row in cur.fetchall()}
+
+        pending = [(version, path) for version, path in list_migrations() if version not in applied]
+        print(f"Applied: {len(applied)}, pending: {len(pending)}")
+
+        for version, path in pending:
+            print(f"  {'Would apply' if dry_run else 'Applying'} {version}...")
+            if dry_run:
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                sql = f.read()
+            with conn, conn.cursor() as cur:
+                cur.execute(sql)
+                cur.execute("INSERT INTO schema_migrations (version) VALUES (%s)", (version,))
+            print(f"  ✅ {version}")
+    except Exception as e:
+        print(f"❌ Migration failed: {e}")
+        return False
+    finally:
+        conn.close()
+
+    print("Migrations up to date.")
+    return True
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply database/migrations/*.sql in order")
+    parser.add_argument("--dry-run", action="store_true", help="list pending migrations without applying them")
+    args = parser.parse_args()
+    sys.exit(0 if apply_migrations(dry_run=args.dry_run) else 1)
@@ -0,0 +1,188 @@
+import os
+import sys
+import time
+import argparse
+import statistics
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import BENCH_DATABASE_URL
+from scripts.apply_migrations import MIGRATIONS_DIR
+
+# Migrations whose effect is measured: applied between the "before" and "after" runs
+BENCHMARKED_MIGRATIONS = ["0004_submission_indexes.sql"]
+
+BENCH_SCHEMA = "gita_bench"
+
+# Same tables as database/schema.sql, minus Supabase-only parts (uuid-ossp, storage, RLS)
+BENCH_DDL = """
+CREATE TABLE chapters (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    chapter_number INTEGER UNIQUE NOT NULL,
+    chapter_name TEXT NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT now(),
+    updated_at TIMESTAMPTZ DEFAULT now()
+);
+CREATE TABLE slokas (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    chapter_id UUID REFERENCES chapters(id) ON DELETE CASCADE,
+    sloka_number INTEGER NOT NULL,
+    sloka_text_telugu TEXT NOT NULL,
+    meaning_telugu TEXT NOT NULL,
+    meaning_english TEXT NOT NULL,
+    reference_audio_url TEXT,
+    reference_audio_renditions JSONB DEFAULT '[]'::jsonb,
+    created_at TIMESTAMPTZ DEFAULT now(),
+    updated_at TIMESTAMPTZ DEFAULT now(),
+    UNIQUE(chapter_id, sloka_number)
+);
+CREATE TABLE users (
+    id UUID PRIMARY KEY,
+    name TEXT NOT NULL,
+    email TEXT UNIQUE NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT now(),
+    updated_at TIMESTAMPTZ DEFAULT now()
+);
+CREATE TABLE user_submissions (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    user_id UUID NOT NULL,
+    sloka_id UUID REFERENCES slokas(id) ON DELETE CASCADE,
+    recitation_audio_url TEXT,
+    explanation_audio_url TEXT,
+    status TEXT CHECK (status IN ('Submitted', 'Approved', 'Rejected')) DEFAULT 'Submitted',
+    admin_notes TEXT,
+    audio_metadata JSONB DEFAULT '{}'::jsonb,
+    created_at TIMESTAMPTZ DEFAULT now(),
+    updated_at TIMESTAMPTZ DEFAULT now()
+);
+"""
+
+SEED_SQL = """
+INSERT INTO chapters (chapter_number, chapter_name)
+SELECT n, 'Chapter ' || n FROM generate_series(1, 18) AS n;
+
+INSERT INTO slokas (chapter_id, sloka_number, sloka_text_telugu, meaning_telugu, meaning_english)
+SELECT c.id, n, 'text', 'meaning', 'meaning'
+FROM chapters c, generate_series(1, 40) AS n;
+
+INSERT INTO users (id, name, email)
+SELECT gen_random_uuid(), 'User ' || n, 'user' || n || '@example.com'
+FROM generate_series(1, %(users)s) AS n;
+
+WITH s AS (SELECT array_agg(id) AS ids FROM slokas),
+     u AS (SELECT array_agg(id) AS ids FROM users)
+INSERT INTO user_submissions (user_id, sloka_id, recitation_audio_url, status, created_at)
+SELECT
+    u.ids[1 + floor(random() * array_length(u.ids, 1))::int],
+    s.ids[1 + floor(random() * array_length(s.ids, 1))::int],
+    'https://example.com/rec/' || n || '.ogg',
+    CASE WHEN random() < 0.05 THEN 'Submitted' WHEN random() < 0.8 THEN 'Approved' ELSE 'Rejected' END,
+    now() - random() * interval '730 days'
+FROM generate_series(1, %(submissions)s) AS n, s, u;
+
+ANALYZE;
+"""
+
+# The queries the portal and dashboard issue, with parameters picked from the seeded data
+QUERIES = {
+    "review queue (status, newest first)": """
+        SELECT * FROM user_submissions WHERE status = 'Submitted'
+        ORDER BY created_at DESC, id DESC LIMIT 21""",
+    "review queue, keyset page 2": """
+        SELECT * FROM user_submissions WHERE status = 'Submitted'
+          AND (created_at, id) < (SELECT created_at, id FROM user_submissions WHERE status = 'Submitted'
+                                  ORDER BY created_at DESC, id DESC OFFSET 20 LIMIT 1)
+        ORDER BY created_at DESC, id DESC LIMIT 21""",
+    "learner history (user_id, newest first)": """
+        SELECT * FROM user_submissions WHERE user_id = (SELECT id FROM users ORDER BY email LIMIT 1)
+        ORDER BY created_at DESC, id DESC LIMIT 21""",
+    "submissions for one sloka": """
+        SELECT * FROM user_submissions WHERE sloka_id = (SELECT id FROM slokas ORDER BY id LIMIT 1)
+        ORDER BY created_at DESC, id DESC LIMIT 21""",
+    "all submissions, newest first": """
+        SELECT * FROM user_submissions ORDER BY created_at DESC, id DESC LIMIT 21""",
+}
+
+def time_query(cur, sql, runs):
+    """Median execution time in ms plus the plan's top node, from EXPLAIN ANALYZE"""
+    timings = []
+    plan = None
+    for _ in range(runs):
+        cur.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql)
+        result = cur.fetchone()[0][0]
+        timings.append(result["Execution Time"])
+        plan = result["Plan"]
+    return statistics.median(timings), plan
+
+def describe_plan(plan):
+    """Compact one-line summary: node types down the first child chain"""
+    nodes = []
+    while plan:
+        label = plan["Node Type"]
+        if plan.get("Index Name"):
+            label += f" using {plan['Index Name']}"
+        nodes.append(label)
+        children = plan.get("Plans") or []
+        plan = children[0] if children else None
+    return " -> ".join(nodes)
+
+def run_queries(cur, runs):
+    return {name: time_query(cur, sql, runs) for name, sql in QUERIES.items()}
+
+def benchmark(database_url=BENCH_DATABASE_URL, submissions=1_000_000, users=20_000, runs=5, keep=False):
+    try:
+        import psycopg2
+    except ImportError:
+        print("❌ psycopg2 is required: pip install psycopg2-binary")
+        return None
+
+    conn = psycopg2.connect(database_url)
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE")
+            cur.execute(f"CREATE SCHEMA {BENCH_SCHEMA}")
+            cur.execute(f"SET search_path TO {BENCH_SCHEMA}, public")
+            cur.execute(BENCH_DDL)
+
+            print(f"Seeding {submissions:,} submissions for {users:,} users...")
+            started = time.perf_counter()
+            cur.execute(SEED_SQL, {"submissions": submissions, "users": users})
+            print(f"  seeded in {time.perf_counter() - started:.1f}s")
+
+            before = run_queries(cur, runs)
+
+            for migration in BENCHMARKED_MIGRATIONS:
+                print(f"Applying {migration}...")
+                with open(os.path.join(MIGRATIONS_DIR, migration), "r", encoding="utf-8") as f:
+                    cur.execute(f.read())
+            cur.execute("ANALYZE user_submissions")
+
+            after = run_queries(cur, runs)
+
+            if not keep:
+                cur.execute(f"DROP SCHEMA {BENCH_SCHEMA} CASCADE")
+    finally:
+        conn.close()
+
+    print(f"\n{'='*50}")
+    print(f"SUBMISSION QUERY BENCHMARK ({submissions:,} rows, median of {runs} runs)")
+    print(f"{'='*50}")
+    for name in QUERIES:
+        before_ms, before_plan = before[name]
+        after_ms, after_plan = after[name]
+        print(f"\n{name}")
+        print(f"  before: {before_ms:9.2f} ms  {describe_plan(before_plan)}")
+        print(f"  after:  {after_ms:9.2f} ms  {describe_plan(after_plan)}")
+        print(f"  speedup: {before_ms / after_ms if after_ms else float('inf'):.1f}x")
+
+    return before, after
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark user_submissions queries before/after the index migrations")
+    parser.add_argument("--database-url", default=BENCH_DATABASE_URL, help="local Postgres to seed (a scratch schema is used)")
+    parser.add_argument("--submissions", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=20_000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--keep", action="store_true", help=f"keep the {BENCH_SCHEMA} schema afterwards")
+    args = parser.parse_args()
+    benchmark(args.database_url, args.submissions, args.users, args.runs, args.keep)
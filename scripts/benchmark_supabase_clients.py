@@ -0,0 +1,44 @@
+import os
+import sys
+import time
+import argparse
+import statistics
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from supabase import create_client
+from config import SUPABASE_URL, SUPABASE_KEY
+from database.clients import get_client, close_clients
+
+def small_query(client):
+    return client.table("chapters").select("id").limit(1).execute()
+
+def timed(fn):
+    started = time.perf_counter()
+    fn()
+    return (time.perf_counter() - started) * 1000
+
+def benchmark(requests=50):
+    """
+    Per-request latency of a one-row query with a new client (and TCP/TLS connection) per
+    request, as the scripts used to do, against the shared pooled client from
+    database.clients. The first pooled request includes client creation (cold start).
+    """
+    fresh = [timed(lambda: small_query(create_client(SUPABASE_URL, SUPABASE_KEY))) for _ in range(requests)]
+
+    close_clients()
+    cold_start = timed(lambda: small_query(get_client()))
+    pooled = [timed(lambda: small_query(get_client())) for _ in range(requests)]
+
+    print(f"\n{'='*50}")
+    print(f"SUPABASE CLIENT BENCHMARK ({requests} requests)")
+    print(f"{'='*50}")
+    print(f"New client per request: median {statistics.median(fresh):7.1f} ms, p95 {sorted(fresh)[int(len(fresh) * 0.95) - 1]:7.1f} ms")
+    print(f"Shared pooled client:   median {statistics.median(pooled):7.1f} ms, p95 {sorted(pooled)[int(len(pooled) * 0.95) - 1]:7.1f} ms")
+    print(f"Pooled cold start (client creation + first request): {cold_start:.1f} ms")
+    return fresh, pooled, cold_start
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare per-request Supabase clients with the shared connection pool")
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+    benchmark(max(1, args.requests))
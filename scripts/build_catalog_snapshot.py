@@ -0,0 +1,50 @@
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_utils import db_manager
+from database.snapshot import build_snapshot, chapter_json_files
+from config import CATALOG_SNAPSHOT_PATH
+
+def build_catalog_snapshot(out_path=CATALOG_SNAPSHOT_PATH):
+    """Compile the database catalog plus the text in data/chapter*.json into the local catalog snapshot"""
+
+    json_files = chapter_json_files()
+    if not json_files:
+        print(" No chapter JSON files found in the 'data/' folder.")
+        return None
+
+    print(f" Found {len(json_files)} chapter file(s): {[os.path.basename(f) for f in json_files]}")
+
+    # Version first: a write racing the reads below leaves the snapshot newer than its
+    # version, so it is merely discarded on the next check rather than served stale
+    db_version = db_manager.catalog_db_version()
+    if db_version is None:
+        print(" Failed to read the catalog version from the database.")
+        return None
+
+    # Two round trips for the whole catalog
+    try:
+        chapters = db_manager.admin_client.table('chapters').select('*').execute().data
+        slokas = db_manager.admin_client.table('slokas').select('*').execute().data
+    except Exception as e:
+        print(f" Failed to read catalog from database: {e}")
+        return None
+
+    chapter_count, sloka_count, skipped = build_snapshot(out_path, json_files, chapters, slokas, db_version)
+
+    print(f"\n{'='*50}")
+    print("CATALOG SNAPSHOT SUMMARY")
+    print(f"{'='*50}")
+    print(f"Snapshot: {out_path}")
+    print(f"Chapters: {chapter_count}")
+    print(f"Slokas: {sloka_count}")
+    if skipped:
+        print(f"\nSkipped {len(skipped)} JSON entries with no database row (run db_populator.py first):")
+        for chapter_number, sloka_number in skipped:
+            print(f"  Chapter {chapter_number}, Sloka {sloka_number}")
+
+    return out_path
+
+if __name__ == "__main__":
+    build_catalog_snapshot()
@@ -0,0 +1,81 @@
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import REFERENCE_FEATURES_DIR
+from media.feature_index import (FEATURE_PARAMS, content_hash, extract_reference_features, read_index,
+                                 verse_key, write_store)
+from scripts.bulk_audio_uploader import collect_upload_jobs, safe_print
+
+def build_feature_index(directory=REFERENCE_FEATURES_DIR, workers=None, force=False):
+    """
+    Extract scoring features for every reference verse in slokas/ into the memory-mapped
+    store under directory. Verses whose mp3 content hash is unchanged since the last build
+    are copied over from the existing store instead of being decoded again.
+    """
+    import numpy as np
+
+    started = time.perf_counter()
+    sources = collect_upload_jobs("slokas")
+    previous = None if force else read_index(directory)
+    if previous and previous.get('params') != FEATURE_PARAMS:
+        safe_print("Feature parameters changed since the last build: re-extracting everything")
+        previous = None
+    old_entries = previous['entries'] if previous else {}
+    old_features = np.load(os.path.join(directory, previous['features_file']), mmap_mode='r') if previous else None
+
+    entries, arrays, pending = {}, {}, []
+    for source in sources:
+        key = verse_key(source['chapter'], source['sloka'])
+        sha256 = content_hash(source['local_path'])
+        old = old_entries.get(key)
+        if old and old['sha256'] == sha256:
+            entries[key] = dict(old)
+            arrays[key] = old_features[old['offset']:old['offset'] + old['frames']]
+        else:
+            pending.append((key, source, sha256))
+
+    removed = len(set(old_entries) - {verse_key(s['chapter'], s['sloka']) for s in sources})
+    if not pending and not removed and previous:
+        safe_print(f"✅ Feature index is up to date ({len(entries)} verses)")
+        return previous, []
+
+    safe_print(f"Extracting features for {len(pending)} of {len(sources)} verses "
+               f"with {workers or os.cpu_count()} processes...")
+    failures = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(extract_reference_features, source['local_path']): (key, source, sha256)
+                   for key, source, sha256 in pending}
+        for future in as_completed(futures):
+            key, source, sha256 = futures[future]
+            try:
+                prepared = future.result()
+            except Exception as e:
+                safe_print(f"  ❌ Chapter {source['chapter']}, Sloka {source['sloka']}: {e}")
+                failures.append({'chapter': source['chapter'], 'sloka': source['sloka'], 'error': str(e)})
+                continue
+            entries[key] = {'chapter': source['chapter'], 'sloka': source['sloka'], 'sha256': sha256,
+                            'frame_s': prepared['frame_s'], 'duration_s': prepared['duration_s']}
+            arrays[key] = prepared['features']
+
+    index = write_store(entries, arrays, directory)
+    size = os.path.getsize(os.path.join(directory, index['features_file']))
+    safe_print(f"\n{'='*50}")
+    safe_print("FEATURE INDEX SUMMARY")
+    safe_print(f"{'='*50}")
+    safe_print(f"Verses indexed: {len(entries)} ({len(pending) - len(failures)} extracted, "
+               f"{len(entries) - len(pending) + len(failures)} unchanged, {removed} removed)")
+    safe_print(f"Failed: {len(failures)}")
+    safe_print(f"Store: {index['features_file']}, {size / (1024 * 1024):.1f} MB, {time.perf_counter() - started:.1f}s")
+    return index, failures
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the memory-mapped reference audio feature index")
+    parser.add_argument("--dir", default=REFERENCE_FEATURES_DIR, help="Store directory")
+    parser.add_argument("--workers", type=int, default=None, help="Extraction processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="Re-extract every verse")
+    args = parser.parse_args()
+    build_feature_index(args.dir, args.workers, args.force)
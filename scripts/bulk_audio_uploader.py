@@ -2,10 +2,21 @@ import os
 import glob
 import json
 import sys
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from supabase import create_client
-from config import SUPABASE_URL, SUPABASE_KEY, AUDIO_STORAGE_PATH
+from config import (SUPABASE_URL, SUPABASE_KEY, AUDIO_STORAGE_PATH, AUDIO_UPLOAD_WORKERS,
+                    AUDIO_UPLOAD_RETRIES, AUDIO_UPLOAD_MANIFEST, RESUMABLE_UPLOAD_THRESHOLD,
+                    RESUMABLE_UPLOAD_CHUNK_SIZE, RESUMABLE_UPLOAD_STATE)
+from database.clients import get_client, get_http_client
+from media.retry import retry_with_backoff
+from media.resumable_upload import ResumableUploader, UploadStateStore
+from media.upload_manifest import UploadManifest, sha256_of_file
+
+BUCKET = 'public'
 
 def safe_print(text):
     try:
@@ -13,110 +24,210 @@ def safe_print(text):
     except UnicodeEncodeError:
         print(text.encode('utf-8', errors='replace').decode('ascii', errors='ignore'))
 
-def upload_audio_files():
-    """Upload all audio files from slokas folder to Supabase Storage"""
-    
+class TransferProgress:
+    """Thread-safe counters for files/bytes done, reported as MB/s, files/s and ETA"""
+
+    def __init__(self, total_files, total_bytes):
+        self.total_files = total_files
+        self.total_bytes = total_bytes
+        self.done_files = 0
+        self.done_bytes = 0
+        self.started_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def update(self, nbytes):
+        with self._lock:
+            self.done_files += 1
+            self.done_bytes += nbytes
+            return self.summary()
+
+    def summary(self):
+        elapsed = max(time.monotonic() - self.started_at, 1e-6)
+        mb_per_s = self.done_bytes / elapsed / (1024 * 1024)
+        files_per_s = self.done_files / elapsed
+        remaining = self.total_bytes - self.done_bytes
+        eta = remaining / (self.done_bytes / elapsed) if self.done_bytes else 0
+        return (f"[{self.done_files}/{self.total_files}] {mb_per_s:.2f} MB/s, "
+                f"{files_per_s:.1f} files/s, ETA {int(eta) // 60:02d}:{int(eta) % 60:02d}")
+
+def collect_upload_jobs(base_path="slokas"):
+    """List every sloka mp3 under base_path/<chapter>/ with its target storage path"""
+    jobs = []
+    for chapter_folder in sorted(os.listdir(base_path)):
+        chapter_path = os.path.join(base_path, chapter_folder)
+
+        if not os.path.isdir(chapter_path) or not chapter_folder.isdigit():
+            continue
+
+        chapter_number = int(chapter_folder)
+
+        for mp3_file in sorted(glob.glob(os.path.join(chapter_path, "*.mp3"))):
+            filename = os.path.basename(mp3_file)
+            sloka_number = filename.replace('.mp3', '')
+
+            if 'pushpika' in sloka_number.lower():
+                safe_print(f"  Skipping special file: Chapter {chapter_number}/{filename}")
+                continue
+
+            jobs.append({
+                'chapter': chapter_number,
+                'sloka': sloka_number,
+                'filename': filename,
+                'local_path': mp3_file,
+                'size': os.path.getsize(mp3_file),
+                'storage_path': f"{AUDIO_STORAGE_PATH}/{chapter_number}/{sloka_number}.mp3",
+            })
+    return jobs
+
+def upload_one(supabase, resumable, job, retries):
+    """
+    Upload a single file, retrying transient failures with exponential backoff and jitter.
+    Files of RESUMABLE_UPLOAD_THRESHOLD bytes or more go through chunked, resumable uploads.
+    """
+
+    if job['size'] >= RESUMABLE_UPLOAD_THRESHOLD:
+        # Keyed by content, so a re-encoded file (even of the same size) starts a fresh upload
+        sha256 = job.get('sha256') or sha256_of_file(job['local_path'])
+        resumable.upload(job['local_path'], BUCKET, job['storage_path'], content_type="audio/mpeg",
+                         fingerprint=f"{BUCKET}/{job['storage_path']}:{sha256}")
+        return supabase.storage.from_(BUCKET).get_public_url(job['storage_path'])
+
+    def attempt():
+        with open(job['local_path'], 'rb') as file:
+            return supabase.storage.from_(BUCKET).upload(
+                path=job['storage_path'],
+                file=file.read(),
+                file_options={"content-type": "audio/mpeg", "upsert": "true"}
+            )
+
+    def on_retry(attempt_number, error, delay):
+        safe_print(f"    ↻ Retry {attempt_number}/{retries} for {job['storage_path']} in {delay:.1f}s: {error}")
+
+    retry_with_backoff(attempt, retries=retries, on_retry=on_retry)
+    return supabase.storage.from_(BUCKET).get_public_url(job['storage_path'])
+
+def upload_audio_files(workers=AUDIO_UPLOAD_WORKERS, retries=AUDIO_UPLOAD_RETRIES, incremental=True):
+    """
+    Upload all audio files from slokas folder to Supabase Storage.
+    With incremental=True only files that changed since the last run (per the upload manifest) are sent.
+    """
+
     safe_print(f"Using Supabase URL: {SUPABASE_URL}")
     safe_print(f"Storage path: {AUDIO_STORAGE_PATH}")
-    
-    # Initialize Supabase client
+
+    # Initialize Supabase client (its HTTP connection pool is shared by all workers)
     try:
-        supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+        supabase = get_client()
+        resumable = ResumableUploader.for_supabase(
+            SUPABASE_URL, SUPABASE_KEY,
+            http_client=get_http_client(),
+            state_store=UploadStateStore(RESUMABLE_UPLOAD_STATE),
+            chunk_size=RESUMABLE_UPLOAD_CHUNK_SIZE,
+            retries=retries,
+        )
         safe_print("✅ Supabase client initialized successfully")
     except Exception as e:
         safe_print(f"❌ Failed to initialize Supabase client: {str(e)}")
         return [], []
-    
-    base_path = "slokas"
+
     upload_results = []
     failed_uploads = []
-    
-    safe_print("Starting bulk audio upload to Supabase Storage...")
-    
-    for chapter_folder in sorted(os.listdir(base_path)):
-        chapter_path = os.path.join(base_path, chapter_folder)
-        
-        if not os.path.isdir(chapter_path) or not chapter_folder.isdigit():
-            continue
-            
-        chapter_number = int(chapter_folder)
-        safe_print(f"\nProcessing Chapter {chapter_number}...")
-        
-        mp3_files = glob.glob(os.path.join(chapter_path, "*.mp3"))
-        
-        for mp3_file in sorted(mp3_files):
-            filename = os.path.basename(mp3_file)
-            sloka_number = filename.replace('.mp3', '')
-            
-            if 'pushpika' in sloka_number.lower():
-                safe_print(f"  Skipping special file: {filename}")
+
+    jobs = collect_upload_jobs("slokas")
+
+    manifest = UploadManifest(AUDIO_UPLOAD_MANIFEST, target=f"{SUPABASE_URL}/{BUCKET}")
+    if incremental:
+        changed_jobs = []
+        for job in jobs:
+            needs_upload, job['sha256'] = manifest.check(job['local_path'], job['storage_path'])
+            entry = manifest.get(job['local_path'])
+            if needs_upload or not entry:
+                changed_jobs.append(job)
                 continue
-                
-            storage_path = f"{AUDIO_STORAGE_PATH}/{chapter_number}/{sloka_number}.mp3"
-            
+            upload_results.append({
+                'chapter': job['chapter'],
+                'sloka': job['sloka'],
+                'filename': job['filename'],
+                'storage_path': job['storage_path'],
+                'public_url': entry['public_url'],
+                'status': 'unchanged'
+            })
+        safe_print(f"Incremental mode: {len(jobs) - len(changed_jobs)} unchanged, {len(changed_jobs)} to upload")
+        jobs = changed_jobs
+
+    progress = TransferProgress(len(jobs), sum(job['size'] for job in jobs))
+    safe_print(f"Starting bulk audio upload to Supabase Storage: {len(jobs)} files, "
+               f"{progress.total_bytes / (1024 * 1024):.1f} MB, {workers} workers...")
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {executor.submit(upload_one, supabase, resumable, job, retries): job for job in jobs}
+        for future in as_completed(futures):
+            job = futures[future]
             try:
-                safe_print(f"  Uploading: {filename} -> {storage_path}")
-                
-                with open(mp3_file, 'rb') as file:
-                    result = supabase.storage.from_('public').upload(
-                        path=storage_path,
-                        file=file,
-                        file_options={"content-type": "audio/mpeg", "upsert": "true"}
-                    )
-                
-                safe_print(f"    Upload result: {result}")
-                
-                public_url = supabase.storage.from_('public').get_public_url(storage_path)
-                
+                public_url = future.result()
                 upload_results.append({
-                    'chapter': chapter_number,
-                    'sloka': sloka_number,
-                    'filename': filename,
-                    'storage_path': storage_path,
+                    'chapter': job['chapter'],
+                    'sloka': job['sloka'],
+                    'filename': job['filename'],
+                    'storage_path': job['storage_path'],
                     'public_url': public_url,
                     'status': 'success'
                 })
-                
-                safe_print(f"    ✅ Success: {public_url}")
-                
+                manifest.record(job['local_path'], job['storage_path'], job.get('sha256'), public_url)
+                safe_print(f"  ✅ {job['storage_path']} {progress.update(job['size'])}")
             except Exception as e:
-                error_msg = f"Failed to upload {filename}: {str(e)}"
-                safe_print(f"    ❌ {error_msg}")
                 failed_uploads.append({
-                    'chapter': chapter_number,
-                    'sloka': sloka_number,
-                    'filename': filename,
+                    'chapter': job['chapter'],
+                    'sloka': job['sloka'],
+                    'filename': job['filename'],
                     'error': str(e)
                 })
-    
+                safe_print(f"  ❌ Failed to upload {job['storage_path']}: {str(e)} {progress.update(0)}")
+
+    try:
+        manifest.save()
+    except Exception as e:
+        safe_print(f"❌ Failed to save {AUDIO_UPLOAD_MANIFEST}: {str(e)}")
+
+    upload_results.sort(key=lambda r: (r['chapter'], r['filename']))
+    failed_uploads.sort(key=lambda r: (r['chapter'], r['filename']))
+
     safe_print(f"\n{'='*50}")
     safe_print("UPLOAD SUMMARY")
     safe_print(f"{'='*50}")
-    safe_print(f"Total successful uploads: {len(upload_results)}")
+    safe_print(f"Total successful uploads: {len([r for r in upload_results if r['status'] == 'success'])}")
+    safe_print(f"Total unchanged (skipped): {len([r for r in upload_results if r['status'] == 'unchanged'])}")
     safe_print(f"Total failed uploads: {len(failed_uploads)}")
-    
-    if upload_results:
+    safe_print(f"Throughput: {progress.summary()}")
+
+    if progress.total_files:
         safe_print(f"\nSuccessful uploads:")
-        for result in upload_results:
+        for result in [r for r in upload_results if r['status'] == 'success']:
             safe_print(f"  Chapter {result['chapter']}, Sloka {result['sloka']}: {result['public_url']}")
-    
+
     if failed_uploads:
         safe_print(f"\nFailed uploads:")
         for failure in failed_uploads:
             safe_print(f"  Chapter {failure['chapter']}, Sloka {failure['sloka']}: {failure['error']}")
-    
+
     try:
         with open('upload_results.json', 'w', encoding='utf-8') as f:
             json.dump({
                 'successful_uploads': upload_results,
                 'failed_uploads': failed_uploads
             }, f, indent=2, ensure_ascii=False)
-        
+
         safe_print(f"\nResults saved to upload_results.json")
     except Exception as e:
         safe_print(f"❌ Failed to save upload_results.json: {str(e)}")
-    
+
     return upload_results, failed_uploads
 
 if __name__ == "__main__":
-    upload_audio_files()
+    parser = argparse.ArgumentParser(description="Upload slokas/<chapter>/*.mp3 to Supabase Storage")
+    parser.add_argument("--workers", type=int, default=AUDIO_UPLOAD_WORKERS, help="parallel uploads")
+    parser.add_argument("--retries", type=int, default=AUDIO_UPLOAD_RETRIES, help="retries per file on transient errors")
+    parser.add_argument("--incremental", action=argparse.BooleanOptionalAction, default=True,
+                        help="only upload files changed since the last run (default: on)")
+    args = parser.parse_args()
+    upload_audio_files(workers=args.workers, retries=args.retries, incremental=args.incremental)
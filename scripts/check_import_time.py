@@ -0,0 +1,84 @@
+import os
+import re
+import sys
+import argparse
+import statistics
+import subprocess
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Startup budgets in milliseconds, measured in a fresh interpreter. Modules are imported;
+# pages (paths) are executed as a bare script, which includes importing Streamlit itself.
+# Nothing here may touch the network: clients, snapshot and validation are created lazily.
+STARTUP_BUDGETS_MS = {
+    "config": 60,
+    "database.db_utils": 150,
+    "streamlit_app.submission_uploads": 150,
+    "scripts.db_populator": 150,
+    "scripts.db_audio_url_updater": 150,
+    "scripts.build_catalog_snapshot": 150,
+    "streamlit_app/login.py": 1000,
+    "streamlit_app/admin_dashboard.py": 1000,
+}
+
+CHILD = """
+import sys, time
+sys.path.insert(0, {root!r})
+started = time.perf_counter()
+{action}
+print("STARTUP_MS=%.3f" % ((time.perf_counter() - started) * 1000))
+"""
+
+def _action(target):
+    if target.endswith(".py"):
+        return f"import runpy; runpy.run_path({os.path.join(ROOT, target)!r}, run_name='__main__')"
+    return f"import {target}"
+
+def startup_ms(target):
+    """Wall time to import a module (or run a page script) in a fresh interpreter"""
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD.format(root=ROOT, action=_action(target))],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    match = re.search(r"STARTUP_MS=([\d.]+)", result.stdout)
+    if not match:
+        raise RuntimeError(f"{target} failed to start:\n{result.stderr.strip()[-2000:]}")
+    return float(match.group(1))
+
+def heaviest_imports(target, top=10):
+    """[(cumulative_ms, module)] from python -X importtime, heaviest first"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD.format(root=ROOT, action=_action(target))],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        match = re.match(r"import time:\s+\d+ \|\s+(\d+) \| ( *)(\S+)", line)
+        if match and not match.group(2):  # top-level imports only
+            rows.append((int(match.group(1)) / 1000, match.group(3)))
+    return sorted(rows, reverse=True)[:top]
+
+def check_import_time(targets=None, runs=3, top=0):
+    """Median startup time per target against its budget; returns True when all are within budget"""
+    targets = targets or list(STARTUP_BUDGETS_MS)
+    ok = True
+    print(f"{'target':<40} {'median ms':>10} {'budget ms':>10}")
+    for target in targets:
+        budget = STARTUP_BUDGETS_MS.get(target)
+        median = statistics.median(startup_ms(target) for _ in range(runs))
+        over = budget is not None and median > budget
+        ok = ok and not over
+        print(f"{target:<40} {median:10.1f} {budget if budget is not None else '-':>10} {'❌ over budget' if over else '✅'}")
+        if top:
+            for cumulative, module in heaviest_imports(target, top):
+                print(f"    {cumulative:9.1f} ms  {module}")
+    return ok
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check module/page startup time against STARTUP_BUDGETS_MS")
+    parser.add_argument("targets", nargs="*", help="modules or page paths (default: all budgeted targets)")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=0, help="also list the N heaviest top-level imports")
+    args = parser.parse_args()
+    sys.exit(0 if check_import_time(args.targets, max(1, args.runs), args.top) else 1)
@@ -25,19 +25,23 @@ def update_audio_urls():
         print("No successful uploads found.")
         return
     
-    updated_count = 0
+    # Resolve every chapter/sloka number to its row once, instead of two lookups per upload
+    sloka_index = db_manager.get_sloka_index()
+    if not sloka_index:
+        print("Could not load chapters/slokas from database.")
+        return
+
     failed_updates = []
-    
+    pending = {}  # sloka id -> (upload, sloka row with new url); one row per id per upsert
+    unchanged_count = 0
+
     for upload in successful_uploads:
-        chapter_number = upload['chapter']
+        chapter_number = int(upload['chapter'])
         sloka_number = upload['sloka']
         public_url = upload['public_url']
-        
-        print(f"Updating Chapter {chapter_number}, Sloka {sloka_number}...")
-        
-        # Get chapter
-        chapter = db_manager.get_chapter_by_number(chapter_number)
-        if not chapter:
+
+        chapter_slokas = sloka_index.get(chapter_number)
+        if chapter_slokas is None:
             print(f"  ❌ Chapter {chapter_number} not found in database")
             failed_updates.append({
                 'chapter': chapter_number,
@@ -45,36 +49,41 @@ def update_audio_urls():
                 'error': 'Chapter not found'
             })
             continue
-        
-        # Get sloka
-        sloka = db_manager.get_sloka_by_chapter_and_number(chapter['id'], sloka_number)
+
+        sloka = chapter_slokas.get(int(sloka_number)) if str(sloka_number).isdigit() else None
         if not sloka:
-            print(f"  ❌ Sloka {sloka_number} not found in database")
+            print(f"  ❌ Chapter {chapter_number}, Sloka {sloka_number} not found in database")
             failed_updates.append({
                 'chapter': chapter_number,
                 'sloka': sloka_number,
                 'error': 'Sloka not found'
             })
             continue
-        
-        # Update audio URL
-        updated_sloka = db_manager.update_sloka_audio_url(sloka['id'], public_url)
-        if updated_sloka:
-            print(f"  ✅ Updated audio URL: {public_url}")
-            updated_count += 1
-        else:
-            print(f"  ❌ Failed to update audio URL")
+
+        if sloka.get('reference_audio_url') == public_url:
+            unchanged_count += 1
+            continue
+        pending[sloka['id']] = (upload, dict(sloka, reference_audio_url=public_url))
+
+    print(f"Applying {len(pending)} audio URL change(s) in batches...")
+    updated_ids, failures = db_manager.bulk_update_sloka_audio_urls([sloka for _, sloka in pending.values()])
+    updated_count = len(updated_ids)
+
+    for upload, sloka in pending.values():
+        if sloka['id'] in failures:
+            print(f"  ❌ Chapter {upload['chapter']}, Sloka {upload['sloka']}: {failures[sloka['id']]}")
             failed_updates.append({
-                'chapter': chapter_number,
-                'sloka': sloka_number,
-                'error': 'Database update failed'
+                'chapter': upload['chapter'],
+                'sloka': upload['sloka'],
+                'error': f"Database update failed: {failures[sloka['id']]}"
             })
-    
+
     # Print summary
     print(f"\n{'='*50}")
     print("AUDIO URL UPDATE SUMMARY")
     print(f"{'='*50}")
     print(f"Successfully updated: {updated_count}")
+    print(f"Already up to date: {unchanged_count}")
     print(f"Failed updates: {len(failed_updates)}")
     
     if failed_updates:
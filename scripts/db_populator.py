@@ -1,18 +1,21 @@
+import argparse
 import json
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from supabase import create_client, Client
-from config import SUPABASE_URL, SUPABASE_KEY
+from database.clients import get_client
 
-# Initialize Supabase client
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+# Bulk mode: slokas per upsert request, and chapter files processed at once
+BULK_CHUNK_SIZE = 200
+BULK_MAX_WORKERS = 4
 
 def load_json_data(filepath):
     with open(filepath, "r", encoding="utf-8") as f:
         return json.load(f)
 
 def populate_from_json_file(filepath):
+    supabase = get_client()
     print(f"\n Processing: {os.path.basename(filepath)}")
     slokas = load_json_data(filepath)
 
@@ -68,7 +71,72 @@ def populate_from_json_file(filepath):
 
     print(f" Total Slokas Processed: {sloka_count}")
 
-def populate_all_chapters():
+def build_sloka_rows(slokas, chapter_id):
+    """Map JSON entries to slokas rows, keeping the last entry per sloka_number."""
+    rows = {}
+    for sloka in slokas:
+        if "sloka_number" not in sloka:
+            print(f" Skipping invalid entry (missing sloka_number): {sloka.get('sloka_title', 'Unknown')}")
+            continue
+        sloka_number = int(sloka["sloka_number"])
+        # A single upsert statement cannot touch the same (chapter_id, sloka_number) twice
+        rows[sloka_number] = {
+            "chapter_id": chapter_id,
+            "sloka_number": sloka_number,
+            "sloka_text_telugu": sloka.get("sloka_text", ""),
+            "meaning_telugu": sloka.get("telugu_meaning", ""),
+            "meaning_english": sloka.get("english_meaning", ""),
+            "reference_audio_url": sloka.get("reference_audio_url", ""),
+        }
+    return [rows[n] for n in sorted(rows)]
+
+def populate_from_json_file_bulk(filepath, chunk_size=BULK_CHUNK_SIZE):
+    """
+    Set-based variant of populate_from_json_file: one upsert for the chapter (returning its id)
+    and one upsert per chunk of slokas (returning their ids). Returns {sloka_number: id}.
+    """
+    supabase = get_client()
+    name = os.path.basename(filepath)
+    slokas = load_json_data(filepath)
+
+    if not slokas or not isinstance(slokas, list):
+        print(f"  Skipping file {filepath}: No valid data")
+        return {}
+
+    chapter_number = int(slokas[0].get("chapter", 0))
+    chapter_name = slokas[0].get("chapter_name", f"Chapter {chapter_number}")
+
+    # The upsert returns the row, so no follow-up select for the chapter id
+    chapter_response = supabase.table("chapters").upsert(
+        {"chapter_number": chapter_number, "chapter_name": chapter_name},
+        on_conflict="chapter_number"
+    ).execute()
+    chapter_id = chapter_response.data[0]["id"]
+
+    rows = build_sloka_rows(slokas, chapter_id)
+    sloka_ids = {}
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        response = supabase.table("slokas").upsert(chunk, on_conflict="chapter_id,sloka_number").execute()
+        sloka_ids.update({row["sloka_number"]: row["id"] for row in response.data})
+
+    print(f" [{name}] Chapter {chapter_number} (ID: {chapter_id}): upserted {len(sloka_ids)} slokas "
+          f"in {(len(rows) + chunk_size - 1) // chunk_size} request(s)")
+    return sloka_ids
+
+def populate_all_chapters_bulk(file_paths, max_workers=BULK_MAX_WORKERS, chunk_size=BULK_CHUNK_SIZE):
+    failed = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(populate_from_json_file_bulk, path, chunk_size): path for path in file_paths}
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                print(f" Failed to process {os.path.basename(futures[future])}: {e}")
+                failed.append(futures[future])
+    return failed
+
+def populate_all_chapters(bulk=False, max_workers=BULK_MAX_WORKERS, chunk_size=BULK_CHUNK_SIZE):
     data_dir = "data"
     if not os.path.exists(data_dir):
         print(f" 'data/' folder not found.")
@@ -81,6 +149,16 @@ def populate_all_chapters():
         return
 
     print(f" Found {len(json_files)} chapter file(s): {json_files}")
+    if bulk:
+        failed = populate_all_chapters_bulk(
+            [os.path.join(data_dir, f) for f in json_files], max_workers=max_workers, chunk_size=chunk_size
+        )
+        if failed:
+            print(f"\n {len(failed)} chapter file(s) failed.")
+            sys.exit(1)
+        print("\n All chapters processed successfully.")
+        return
+
     for file_name in json_files:
         file_path = os.path.join(data_dir, file_name)
         populate_from_json_file(file_path)
@@ -88,4 +166,9 @@ def populate_all_chapters():
     print("\n All chapters processed successfully.")
 
 if __name__ == "__main__":
-    populate_all_chapters()
+    parser = argparse.ArgumentParser(description="Populate chapters and slokas from data/*.json")
+    parser.add_argument("--bulk", action="store_true", help="batched upserts, chapter files in parallel")
+    parser.add_argument("--workers", type=int, default=BULK_MAX_WORKERS, help="parallel chapter files in bulk mode")
+    parser.add_argument("--chunk-size", type=int, default=BULK_CHUNK_SIZE, help="slokas per upsert in bulk mode")
+    args = parser.parse_args()
+    populate_all_chapters(bulk=args.bulk, max_workers=args.workers, chunk_size=args.chunk_size)
@@ -0,0 +1,117 @@
+import os
+import sys
+import time
+import argparse
+from datetime import datetime, timezone
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.clients import get_http_client
+from database.db_utils import db_manager
+from media.feature_index import get_feature_index
+from media.scoring import decode_audio, prepare_features, score_batch
+from scripts.bulk_audio_uploader import safe_print
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def fetch_audio(url: str):
+    response = get_http_client().get(url)
+    response.raise_for_status()
+    return response.content
+
+
+def reference_source(submission: dict):
+    """The verse's mp3 under slokas/ if this checkout has it, else its reference_audio_url."""
+    local_path = os.path.join(PROJECT_ROOT, 'slokas', str(submission['chapter_number']),
+                              f"{submission['sloka_number']}.mp3")
+    if os.path.isfile(local_path):
+        return local_path
+    for sloka in db_manager.get_slokas_by_chapter(submission['chapter_id']):
+        if sloka['id'] == submission['sloka_id'] and sloka.get('reference_audio_url'):
+            return fetch_audio(sloka['reference_audio_url'])
+    return None
+
+
+def reference_features_for(submission: dict):
+    """Reference features from the prebuilt feature index, else decoded from the verse's audio."""
+    indexed = get_feature_index().get(submission['chapter_number'], submission['sloka_number'])
+    if indexed is not None:
+        return indexed
+    source = reference_source(submission)
+    return prepare_features(decode_audio(source)) if source else None
+
+
+def score_submissions(status='Submitted', batch_size=16, rescore=False, dry_run=False):
+    """
+    Score recitations in the review queue against their verse's reference audio and store
+    the result on user_submissions.similarity. Reference features are computed once per
+    verse; recitations are aligned batch_size at a time.
+    """
+    reference_features = {}  # sloka_id -> prepare_features() result, or None if unavailable
+    scored, skipped, failures = 0, 0, []
+    started = time.perf_counter()
+    cursor = None
+    while True:
+        page = db_manager.get_review_submissions(status=status, page_size=batch_size, cursor=cursor)
+        queries, references, rows = [], [], []
+        for submission in page['rows']:
+            if not submission.get('recitation_audio_url') or (submission.get('similarity') and not rescore):
+                skipped += 1
+                continue
+            try:
+                if submission['sloka_id'] not in reference_features:
+                    reference_features[submission['sloka_id']] = reference_features_for(submission)
+                reference = reference_features[submission['sloka_id']]
+                if reference is None:
+                    skipped += 1
+                    continue
+                queries.append(prepare_features(decode_audio(fetch_audio(submission['recitation_audio_url']))))
+                references.append(reference)
+                rows.append(submission)
+            except Exception as e:
+                safe_print(f"  ❌ Submission {submission['id']}: {e}")
+                failures.append({'id': submission['id'], 'error': str(e)})
+
+        if rows:
+            try:
+                similarities = score_batch(queries, references)
+            except Exception as e:
+                # One bad batch must not stop the run; its submissions are reported as failed
+                safe_print(f"  ❌ Batch of {len(rows)} submissions: {e}")
+                failures += [{'id': submission['id'], 'error': str(e)} for submission in rows]
+                similarities = []
+            scored_at = datetime.now(timezone.utc).isoformat()
+            for submission, similarity in zip(rows, similarities):
+                similarity['scored_at'] = scored_at
+                safe_print(f"  Chapter {submission['chapter_number']}, Sloka {submission['sloka_number']} "
+                           f"({submission.get('user_name') or submission['user_id']}): score {similarity['score']:.2f}, "
+                           f"tempo x{similarity['tempo_ratio']}")
+                if not dry_run and not db_manager.update_submission_similarity(submission['id'], similarity):
+                    failures.append({'id': submission['id'], 'error': "could not save the score"})
+                    continue
+                scored += 1
+
+        cursor = page['next_cursor']
+        if not cursor:
+            break
+
+    elapsed = time.perf_counter() - started
+    safe_print(f"\n{'='*50}")
+    safe_print("SCORING SUMMARY")
+    safe_print(f"{'='*50}")
+    safe_print(f"Scored: {scored}{' (dry run, not saved)' if dry_run else ''}")
+    safe_print(f"Skipped: {skipped} (already scored, no recitation or no reference audio)")
+    safe_print(f"Failed: {len(failures)}")
+    if scored:
+        safe_print(f"Time: {elapsed:.1f}s ({elapsed / scored:.2f}s per submission, including downloads)")
+    return scored, failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score recitations in the review queue against reference audio")
+    parser.add_argument("--status", default="Submitted", help="Submission status to score (default: Submitted)")
+    parser.add_argument("--batch-size", type=int, default=16, help="Recitations aligned together")
+    parser.add_argument("--rescore", action="store_true", help="Re-score submissions that already have a score")
+    parser.add_argument("--dry-run", action="store_true", help="Print scores without saving them")
+    args = parser.parse_args()
+    score_submissions(args.status, args.batch_size, args.rescore, args.dry_run)
@@ -0,0 +1,28 @@
+import os
+import sys
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import LOCAL_MEDIA_HOST, LOCAL_MEDIA_PORT
+from media.media_server import MEDIA_ROOTS, make_server
+
+def serve_media(host=LOCAL_MEDIA_HOST, port=LOCAL_MEDIA_PORT):
+    """Serve slokas/ and renditions/ with Range, ETag and Cache-Control support until interrupted"""
+    server = make_server(host, port)
+    print(f"🎵 Serving reference audio on http://{host}:{port}/")
+    for prefix, root in MEDIA_ROOTS.items():
+        print(f"  /{prefix}/ -> {root}")
+    print("Set REFERENCE_AUDIO_URL_STRATEGY=local for the portal to stream from here.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping media server")
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local range-capable media server for reference audio")
+    parser.add_argument("--host", default=LOCAL_MEDIA_HOST)
+    parser.add_argument("--port", type=int, default=LOCAL_MEDIA_PORT)
+    args = parser.parse_args()
+    serve_media(args.host, args.port)
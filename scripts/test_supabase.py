@@ -3,8 +3,8 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from supabase import create_client
 from config import SUPABASE_URL, SUPABASE_KEY
+from database.clients import get_client
 
 def test_supabase_connection():
     """Test Supabase connection and storage access"""
@@ -15,7 +15,7 @@ def test_supabase_connection():
     
     try:
         # Initialize client
-        supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+        supabase = get_client()
         print("✅ Client initialized successfully")
         
         # Test storage access
@@ -0,0 +1,133 @@
+import os
+import sys
+import shutil
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.db_utils import db_manager
+from config import (SUPABASE_URL, AUDIO_STORAGE_PATH, AUDIO_UPLOAD_RETRIES, REFERENCE_RENDITIONS_DIR,
+                    RENDITION_UPLOAD_MANIFEST)
+from media.renditions import RENDITION_SPECS, rendition_filename, transcode
+from media.retry import retry_with_backoff
+from media.upload_manifest import UploadManifest
+from scripts.bulk_audio_uploader import BUCKET, collect_upload_jobs, safe_print
+
+def transcode_reference_audio(workers=None, upload=True, update_db=True):
+    """
+    Encode every reference verse in slokas/ into the low-bitrate RENDITION_SPECS on a process
+    pool, upload the renditions and record them on slokas.reference_audio_renditions.
+    Renditions already newer than their source mp3 are not re-encoded; they are re-uploaded
+    only when they changed since their last successful upload or are missing from storage.
+    """
+
+    if not shutil.which('ffmpeg'):
+        safe_print("❌ ffmpeg not found on PATH. Install ffmpeg (with libopus) first.")
+        return [], []
+
+    sources = collect_upload_jobs("slokas")
+    tasks = []
+    for source in sources:
+        for spec in RENDITION_SPECS:
+            dst = os.path.join(REFERENCE_RENDITIONS_DIR, str(source['chapter']),
+                               rendition_filename(source['sloka'], spec))
+            tasks.append((source, spec, dst))
+
+    safe_print(f"Transcoding {len(sources)} verses into {len(RENDITION_SPECS)} renditions "
+               f"with {workers or os.cpu_count()} processes...")
+
+    renditions = []
+    failures = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(transcode, source['local_path'], dst, spec): (source, spec)
+                   for source, spec, dst in tasks}
+        for future in as_completed(futures):
+            source, spec = futures[future]
+            try:
+                dst, size, transcoded = future.result()
+            except Exception as e:
+                safe_print(f"  ❌ Chapter {source['chapter']}, Sloka {source['sloka']} ({spec['codec']} {spec['bitrate_kbps']}k): {e}")
+                failures.append({'chapter': source['chapter'], 'sloka': source['sloka'], 'error': str(e)})
+                continue
+            renditions.append({'source': source, 'spec': spec, 'path': dst, 'size': size, 'transcoded': transcoded})
+
+    original_bytes = sum(s['size'] for s in sources)
+    safe_print(f"\n{'='*50}")
+    safe_print("TRANSCODE SUMMARY")
+    safe_print(f"{'='*50}")
+    safe_print(f"Renditions ready: {len(renditions)} ({len([r for r in renditions if r['transcoded']])} newly encoded)")
+    safe_print(f"Failed: {len(failures)}")
+    for spec in RENDITION_SPECS:
+        total = sum(r['size'] for r in renditions if r['spec'] is spec)
+        if total:
+            safe_print(f"  {spec['codec']} {spec['bitrate_kbps']}k: {total / (1024 * 1024):.1f} MB "
+                       f"({original_bytes / total:.1f}x smaller than the originals)")
+
+    if not upload:
+        return renditions, failures
+
+    # Upload whatever the bucket does not hold yet: renditions that are new or changed since
+    # their last successful upload (per the manifest), or missing from storage. A rendition
+    # only gets a URL once its upload has succeeded.
+    bucket = db_manager.supabase.storage.from_(BUCKET)
+    manifest = UploadManifest(RENDITION_UPLOAD_MANIFEST, target=f"{SUPABASE_URL}/{BUCKET}")
+    try:
+        for rendition in renditions:
+            source, spec = rendition['source'], rendition['spec']
+            storage_path = f"{AUDIO_STORAGE_PATH}/renditions/{source['chapter']}/{os.path.basename(rendition['path'])}"
+            try:
+                changed, sha256 = manifest.check(rendition['path'], storage_path)
+                if changed or not retry_with_backoff(lambda: bucket.exists(storage_path), retries=AUDIO_UPLOAD_RETRIES):
+                    with open(rendition['path'], 'rb') as f:
+                        data = f.read()
+                    retry_with_backoff(lambda: bucket.upload(
+                        path=storage_path, file=data,
+                        file_options={"content-type": spec['mime'], "upsert": "true"}
+                    ), retries=AUDIO_UPLOAD_RETRIES)
+                    manifest.record(rendition['path'], storage_path, sha256, bucket.get_public_url(storage_path))
+                rendition['url'] = bucket.get_public_url(storage_path)
+            except Exception as e:
+                safe_print(f"  ❌ Upload failed for {storage_path}: {e}")
+                failures.append({'chapter': source['chapter'], 'sloka': source['sloka'], 'error': str(e)})
+    finally:
+        manifest.save()
+
+    if update_db:
+        update_rendition_metadata([r for r in renditions if r.get('url')])
+
+    return renditions, failures
+
+def update_rendition_metadata(renditions):
+    """Write the rendition list of every verse onto its slokas row in batched upserts"""
+    sloka_index = db_manager.get_sloka_index()
+    by_sloka = {}
+    for rendition in renditions:
+        source, spec = rendition['source'], rendition['spec']
+        sloka = sloka_index.get(source['chapter'], {}).get(int(source['sloka']))
+        if not sloka:
+            safe_print(f"  ❌ Chapter {source['chapter']}, Sloka {source['sloka']} not found in database")
+            continue
+        entry = by_sloka.setdefault(sloka['id'], dict(sloka, reference_audio_renditions=[]))
+        entry['reference_audio_renditions'].append({
+            'codec': spec['codec'],
+            'bitrate_kbps': spec['bitrate_kbps'],
+            'mime': spec['mime'],
+            'url': rendition['url'],
+            'size': rendition['size'],
+        })
+
+    for sloka in by_sloka.values():
+        sloka['reference_audio_renditions'].sort(key=lambda r: (r['bitrate_kbps'], r['codec']))
+
+    updated_ids, failures = db_manager.bulk_update_sloka_renditions(list(by_sloka.values()))
+    safe_print(f"\nRendition metadata updated for {len(updated_ids)} slokas, {len(failures)} failed")
+    for sloka_id, error in failures.items():
+        safe_print(f"  Sloka {sloka_id}: {error}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Produce low-bitrate renditions of the reference audio")
+    parser.add_argument("--workers", type=int, default=None, help="transcoding processes (default: CPU count)")
+    parser.add_argument("--no-upload", action="store_true", help="only transcode locally")
+    parser.add_argument("--no-db", action="store_true", help="do not write rendition metadata to the database")
+    args = parser.parse_args()
+    transcode_reference_audio(workers=args.workers, upload=not args.no_upload, update_db=not args.no_db)
@@ -14,10 +14,10 @@ def print_step(step_number, title):
     print(f"STEP {step_number}: {title}")
     print(f"{'='*60}")
 
-def run_script(script_path, description):
+def run_script(script_path, description, args=()):
     print(f"\n🔄 {description}...")
     try:
-        result = subprocess.run([sys.executable, script_path], capture_output=True, text=True)
+        result = subprocess.run([sys.executable, script_path, *args], capture_output=True, text=True)
         if result.returncode == 0:
             print(f"✅ {description} completed successfully!")
             if result.stdout:
@@ -62,11 +62,12 @@ def main():
     print_step(2, "CREATING DATABASE SCHEMA")
     print("Please run the SQL schema in your Supabase SQL editor:")
     print("File: database/schema.sql")
-    input("Press Enter after running the schema...")
+    print("Then apply database/migrations/ in order (or: python scripts/apply_migrations.py)")
+    input("Press Enter after running the schema and migrations...")
 
     # Step 3: Populate database with JSON data
     print_step(3, "POPULATING DATABASE WITH JSON DATA")
-    if not run_script("scripts/db_populator.py", "Database population"):
+    if not run_script("scripts/db_populator.py", "Database population", ["--bulk"]):
         print("❌ Database population failed. Please check the errors above.")
         return
 
@@ -82,8 +83,13 @@ def main():
         print("❌ Audio URL updates failed. Please check the errors above.")
         return
 
-    # Step 6: Final verification
-    print_step(6, "FINAL VERIFICATION")
+    # Step 6: Build the local catalog snapshot
+    print_step(6, "BUILDING CATALOG SNAPSHOT")
+    if not run_script("scripts/build_catalog_snapshot.py", "Catalog snapshot build"):
+        print("⚠️ Catalog snapshot build failed. The portal will read the catalog from Supabase.")
+
+    # Step 7: Final verification
+    print_step(7, "FINAL VERIFICATION")
     print("✅ Setup completed successfully!")
 
     print("\n🎉 GITA GURU PLATFORM IS READY!")
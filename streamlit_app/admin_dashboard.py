@@ -1,9 +1,14 @@
 import streamlit as st
+import streamlit.components.v1 as components
+import html
+import json
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from database.db_utils import db_manager
+from media.renditions import playable_mimes
+from media.submission_audio import describe_audio, playable_submission_url
 
 # Page configuration
 st.set_page_config(
@@ -83,7 +88,7 @@ def show_review_submissions():
     st.header("📋 Review User Submissions")
     
     # Filter options
-    col1, col2, col3 = st.columns(3)
+    col1, col2, col3, col4 = st.columns(4)
     
     with col1:
         status_filter = st.selectbox(
@@ -94,75 +99,112 @@ def show_review_submissions():
     with col2:
         # Get all chapters for filtering
         chapters = db_manager.get_all_chapters()
+        chapter_labels = {f"Chapter {c['chapter_number']}: {c['chapter_name']}": c for c in chapters}
         chapter_filter = st.selectbox(
             "Filter by Chapter",
-            ["All"] + [f"Chapter {c['chapter_number']}: {c['chapter_name']}" for c in chapters]
+            ["All"] + list(chapter_labels)
         )
     
     with col3:
+        page_size = st.selectbox("Per page", [10, 20, 50], index=1)
+    
+    with col4:
         if st.button("🔄 Refresh"):
+            st.session_state.pop("review_cursors", None)
             st.rerun()
     
-    # Get submissions based on filters
-    submissions = get_filtered_submissions(status_filter, chapter_filter)
+    # Cursor stack for the current filters: [None, cursor of page 2, ...]; reset when filters change
+    filter_key = (status_filter, chapter_filter, page_size)
+    if st.session_state.get("review_filter_key") != filter_key:
+        st.session_state["review_filter_key"] = filter_key
+        st.session_state["review_cursors"] = [None]
+    cursors = st.session_state.setdefault("review_cursors", [None])
+    
+    # Get one page of submissions based on filters
+    page = get_filtered_submissions(status_filter, chapter_labels.get(chapter_filter), page_size, cursors[-1])
+    submissions = page['rows']
     
     if not submissions:
         st.info("No submissions found matching the criteria.")
         return
     
-    # Display submissions
-    for submission in submissions:
-        display_submission_card(submission)
+    st.caption(f"Page {len(cursors)}")
+    
+    # Display submissions; each card also gets the next one so its audio can be prefetched
+    for i, submission in enumerate(submissions):
+        next_submission = submissions[i + 1] if i + 1 < len(submissions) else None
+        display_submission_card(submission, next_submission)
+    
+    prev_col, next_col = st.columns(2)
+    with prev_col:
+        if len(cursors) > 1 and st.button("⬅️ Previous page", use_container_width=True):
+            cursors.pop()
+            st.rerun()
+    with next_col:
+        if page['has_more'] and st.button("Next page ➡️", use_container_width=True):
+            cursors.append(page['next_cursor'])
+            st.rerun()
 
-def get_filtered_submissions(status_filter, chapter_filter):
-    """Get submissions based on filters"""
+def get_filtered_submissions(status_filter, chapter, page_size, cursor=None):
+    """Get one page of submissions, with status and chapter filters applied in the database"""
     try:
-        # Get all submissions with user and sloka details
-        query = """
-        SELECT 
-            us.*,
-            u.name as user_name,
-            u.email as user_email,
-            s.sloka_number,
-            s.sloka_text_telugu,
-            c.chapter_number,
-            c.chapter_name
-        FROM user_submissions us
-        JOIN users u ON us.user_id = u.id
-        JOIN slokas s ON us.sloka_id = s.id
-        JOIN chapters c ON s.chapter_id = c.id
-        """
-        
-        # Apply filters
-        if status_filter != "All":
-            query += f" WHERE us.status = '{status_filter}'"
-        
-        # This is a simplified approach - in production, you'd use proper SQL filtering
-        submissions = db_manager.supabase.table('user_submissions').select(
-            '*, users(name, email), slokas(sloka_number, sloka_text_telugu), chapters(chapter_number, chapter_name)'
-        ).execute()
-        
-        filtered_submissions = []
-        for submission in submissions.data:
-            # Apply status filter
-            if status_filter != "All" and submission['status'] != status_filter:
-                continue
-            
-            # Apply chapter filter
-            if chapter_filter != "All":
-                chapter_info = f"Chapter {submission['chapters']['chapter_number']}: {submission['chapters']['chapter_name']}"
-                if chapter_info != chapter_filter:
-                    continue
-            
-            filtered_submissions.append(submission)
-        
-        return filtered_submissions
-        
+        return db_manager.get_review_submissions(
+            status=None if status_filter == "All" else status_filter,
+            chapter_number=chapter['chapter_number'] if chapter else None,
+            page_size=page_size,
+            cursor=cursor
+        )
     except Exception as e:
         st.error(f"Error fetching submissions: {e}")
-        return []
+        return {'rows': [], 'next_cursor': None, 'has_more': False}
+
+def audio_urls(submission):
+    """(label, url) of each audio part, in a format the reviewer's browser can play"""
+    mimes = playable_mimes(st.context.headers.get("User-Agent", ""))
+    audio_metadata = submission.get('audio_metadata') or {}
+    return [(label, playable_submission_url(submission[key], audio_metadata.get(label.lower()), mimes))
+            for label, key in (("Recitation", 'recitation_audio_url'), ("Explanation", 'explanation_audio_url'))
+            if submission.get(key)]
+
+def prefetch_audio(submission):
+    """Hidden preload-only audio elements, so the browser fetches the next card's audio in the background"""
+    tags = "".join(f'<audio preload="auto" src="{html.escape(url, quote=True)}" style="display:none"></audio>'
+                   for _, url in audio_urls(submission))
+    if tags:
+        st.markdown(tags, unsafe_allow_html=True)
+
+def speech_player(url, segments):
+    """
+    Audio player that jumps over the pauses between the speech segments recorded at
+    submission time (media/vad.py) and stops after the last one.
+    """
+    components.html(f"""
+    <audio id="player" controls preload="metadata" src="{html.escape(url, quote=True)}" style="width:100%"></audio>
+    <script>
+      const segments = {json.dumps(segments)};
+      const player = document.getElementById("player");
+      player.addEventListener("timeupdate", () => {{
+        const t = player.currentTime;
+        const next = segments.find(([start, end]) => t < end);
+        if (!next) {{ player.pause(); return; }}
+        if (t < next[0] - 0.05) player.currentTime = next[0];
+      }});
+    </script>
+    """, height=60)
 
-def display_submission_card(submission):
+def similarity_details(submission, worst=3):
+    """Automatic score from scripts/score_submissions.py plus the least similar stretches, as HTML"""
+    similarity = submission.get('similarity')
+    if not similarity:
+        return ""
+    segments = sorted(similarity.get('segments') or [], key=lambda s: s['cost'], reverse=True)[:worst]
+    stretches = ", ".join(
+        f"{s['start_s']:.1f}–{s['end_s']:.1f}s ({s['offset_s']:+.1f}s vs. reference)" for s in segments
+    )
+    return (f"<p><strong>Similarity:</strong> {similarity['score']:.0%} · tempo ×{similarity['tempo_ratio']}</p>"
+            + (f"<p><strong>Check first:</strong> {stretches}</p>" if stretches else ""))
+
+def display_submission_card(submission, next_submission=None):
     """Display a submission card for review"""
     status = submission['status']
     status_color = {
@@ -171,24 +213,40 @@ def display_submission_card(submission):
         'Rejected': 'danger'
     }.get(status, 'secondary')
     
+    # Duration/format recorded at capture time, so the card needs no audio download
+    audio_metadata = submission.get('audio_metadata') or {}
+    audio_details = "".join(
+        f"<p><strong>{kind.title()}:</strong> {describe_audio(info)}</p>"
+        for kind, info in audio_metadata.items() if isinstance(info, dict)
+    )
+    
     st.markdown(f"""
     <div class="submission-card status-{status.lower()}">
-        <h4>Submission by {submission['users']['name']} ({submission['users']['email']})</h4>
-        <p><strong>Chapter:</strong> {submission['chapters']['chapter_number']}: {submission['chapters']['chapter_name']}</p>
-        <p><strong>Sloka:</strong> {submission['slokas']['sloka_number']}</p>
+        <h4>Submission by {submission['user_name'] or 'Unknown user'} ({submission['user_email'] or 'N/A'})</h4>
+        <p><strong>Chapter:</strong> {submission['chapter_number']}: {submission['chapter_name']}</p>
+        <p><strong>Sloka:</strong> {submission['sloka_number']}</p>
         <p><strong>Status:</strong> <span class="badge bg-{status_color}">{status}</span></p>
         <p><strong>Submitted:</strong> {submission['created_at'][:19]}</p>
+        {audio_details}
+        {similarity_details(submission)}
     </div>
     """, unsafe_allow_html=True)
     
-    # Audio players
-    if submission['recitation_audio_url']:
-        st.markdown("**Recitation Audio:**")
-        st.audio(submission['recitation_audio_url'])
-    
-    if submission['explanation_audio_url']:
-        st.markdown("**Explanation Audio:**")
-        st.audio(submission['explanation_audio_url'])
+    # Audio players are only created once the reviewer opens this card's audio, so a long
+    # queue renders metadata only; opening a card preloads the next card's audio
+    urls = audio_urls(submission)
+    if urls and st.toggle("🎧 Listen", key=f"listen_{submission['id']}"):
+        segments = {label: (audio_metadata.get(label.lower()) or {}).get('speech_segments') for label, _ in urls}
+        skip_pauses = any(len(s or []) > 1 for s in segments.values()) and st.toggle(
+            "⏩ Skip pauses", value=True, key=f"skip_pauses_{submission['id']}")
+        for label, url in urls:
+            st.markdown(f"**{label} Audio:**")
+            if skip_pauses and len(segments[label] or []) > 1:
+                speech_player(url, segments[label])
+            else:
+                st.audio(url)
+        if next_submission:
+            prefetch_audio(next_submission)
     
     # Admin actions
     if status == "Submitted":
@@ -249,17 +307,17 @@ def update_submission_notes(submission_id, notes):
 
 def show_statistics():
     st.header("📊 Submission Statistics")
+    import pandas as pd  # only this page needs it; importing it up front doubles startup time
     
     try:
-        # Get basic statistics
-        all_submissions = db_manager.supabase.table('user_submissions').select('*').execute()
-        submissions = all_submissions.data
+        # Counters maintained by database triggers: a few dozen rows however many submissions exist
+        stats = db_manager.get_submission_stats(days=30)
         
-        if submissions:
-            total_submissions = len(submissions)
-            submitted_count = len([s for s in submissions if s['status'] == 'Submitted'])
-            approved_count = len([s for s in submissions if s['status'] == 'Approved'])
-            rejected_count = len([s for s in submissions if s['status'] == 'Rejected'])
+        if stats['total']:
+            total_submissions = stats['total']
+            submitted_count = stats['by_status'].get('Submitted', 0)
+            approved_count = stats['by_status'].get('Approved', 0)
+            rejected_count = stats['by_status'].get('Rejected', 0)
             
             # Display statistics
             col1, col2, col3, col4 = st.columns(4)
@@ -281,9 +339,22 @@ def show_statistics():
                 approval_rate = (approved_count / total_submissions) * 100
                 st.metric("Approval Rate", f"{approval_rate:.1f}%")
             
-            # Recent activity
+            statuses = ["Submitted", "Approved", "Rejected"]
+            
+            if stats['by_chapter']:
+                st.subheader("Submissions by Chapter")
+                by_chapter = pd.DataFrame.from_dict(stats['by_chapter'], orient="index").reindex(columns=statuses).fillna(0).sort_index()
+                st.bar_chart(by_chapter)
+            
+            if stats['by_day']:
+                st.subheader("Daily Submissions (last 30 days)")
+                by_day = pd.DataFrame.from_dict(stats['by_day'], orient="index").reindex(columns=statuses).fillna(0)
+                by_day.index = pd.to_datetime(by_day.index)
+                st.line_chart(by_day.sort_index())
+            
+            # Recent activity: first page of the review view, served by the (created_at, id) index
             st.subheader("Recent Activity")
-            recent_submissions = sorted(submissions, key=lambda x: x['created_at'], reverse=True)[:10]
+            recent_submissions = db_manager.get_review_submissions(page_size=10)['rows']
             
             for submission in recent_submissions:
                 st.markdown(f"""
@@ -299,6 +370,11 @@ def show_statistics():
 def show_manage_content():
     st.header("🔧 Manage Content")
     
+    # Flushes the catalog caches of every portal session on this host, hence admin only
+    if st.button("🔄 Refresh catalog", help="Reload chapters and slokas from the database in all apps"):
+        db_manager.request_catalog_refresh()
+        st.success("Catalog reloaded; the user portal picks it up on its next page load.")
+    
     st.markdown("""
     ### Content Management Options
     
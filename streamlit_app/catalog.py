@@ -0,0 +1,55 @@
+import streamlit as st
+
+from config import PORTAL_CATALOG_TTL
+from database.db_utils import db_manager
+
+# Catalog reads for the portal pages, cached by Streamlit across reruns and sessions.
+# Every loader takes the catalog version as its first argument, so a catalog write in this
+# process starts a fresh set of cache entries; invalidate_catalog() drops them all.
+
+
+@st.cache_resource(ttl=PORTAL_CATALOG_TTL, show_spinner=False)
+def _load_chapters(version: str):
+    """Chapters in order plus a label -> chapter lookup; one shared, read-only copy per process."""
+    chapters = db_manager.get_all_chapters()
+    labels = {f"Chapter {ch['chapter_number']}: {ch['chapter_name']}": ch for ch in chapters}
+    return chapters, labels
+
+
+@st.cache_data(ttl=PORTAL_CATALOG_TTL, max_entries=64, show_spinner=False)
+def _load_slokas(version: str, chapter_id: str):
+    return db_manager.get_slokas_by_chapter(chapter_id)
+
+
+def get_chapters():
+    """(chapters, {label: chapter}); an empty result is not kept, so a failed fetch is retried."""
+    version = db_manager.catalog_version
+    chapters, labels = _load_chapters(version)
+    if not chapters:
+        _load_chapters.clear(version)
+    return chapters, labels
+
+
+def get_slokas(chapter_id: str):
+    version = db_manager.catalog_version
+    slokas = _load_slokas(version, chapter_id)
+    if not slokas:
+        _load_slokas.clear(version, chapter_id)
+    return slokas
+
+
+def invalidate_catalog():
+    """
+    Drop every cached catalog entry (Streamlit's and DatabaseManager's) and re-read the
+    snapshot, in this and every other app process on the host. Process-wide, so admin only.
+    """
+    db_manager.request_catalog_refresh()
+
+
+def _clear_streamlit_caches():
+    _load_chapters.clear()
+    _load_slokas.clear()
+
+
+# Catalog writes through db_manager (and refresh_catalog) clear the Streamlit caches too
+db_manager.add_catalog_listener(_clear_streamlit_caches)
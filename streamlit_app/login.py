@@ -9,14 +9,9 @@ import wave, contextlib
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from supabase import create_client
-from config import SUPABASE_URL, SUPABASE_KEY, SUPABASE_SERVICE_ROLE_KEY
+from database.clients import get_client, new_auth_client
 from database.db_utils import db_manager
 
-# Clients
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-admin_client = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)  # server-side admin checks
-
 # Use your bucket; override with .env SUPABASE_BUCKET if needed
 BUCKET_NAME = os.getenv("SUPABASE_BUCKET", "gita-guru")
 
@@ -246,7 +241,7 @@ with st.container():
                 st.markdown('<div class="error-message">Please fill in all fields</div>', unsafe_allow_html=True)
             else:
                 try:
-                    auth_response = supabase.auth.sign_in_with_password({"email": email, "password": password})
+                    auth_response = new_auth_client().auth.sign_in_with_password({"email": email, "password": password})
 
                     if auth_response and getattr(auth_response, "user", None):
                         user_obj = auth_response.user
@@ -254,7 +249,7 @@ with st.container():
 
                         # Use admin client to check users table (bypass RLS) so existing users are detected reliably
                         try:
-                            res = admin_client.table("users").select("*").eq("id", user_id).execute()
+                            res = get_client("service").table("users").select("*").eq("id", user_id).execute()
                             existing = res.data[0] if res.data else None
 
                             if existing:
@@ -305,7 +300,7 @@ with st.container():
             else:
                 try:
                     # Create auth user
-                    auth_response = supabase.auth.sign_up({"email": email, "password": password})
+                    auth_response = new_auth_client().auth.sign_up({"email": email, "password": password})
 
                     if auth_response and getattr(auth_response, "user", None):
                         user_id = auth_response.user.id
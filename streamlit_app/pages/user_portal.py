@@ -2,13 +2,20 @@ import streamlit as st
 import sys
 import os
 import uuid
+import wave
 from datetime import datetime
 from audio_recorder_streamlit import audio_recorder
-from io import BytesIO
-import wave, contextlib
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from database.db_utils import db_manager
+from media.renditions import reference_audio_for, playable_mimes
+from media.submission_audio import prepare_submission_audio, probe_audio, describe_audio
+from streamlit_app.submission_uploads import SubmissionJob
+from streamlit_app.catalog import get_chapters, get_slokas
+from streamlit_app.prefetch import prefetch_next
+from config import SUBMISSION_MAX_UPLOAD_BYTES
+
+# Reference audio quality -> highest rendition bitrate to stream (None = original mp3)
+AUDIO_QUALITY_KBPS = {"Data saver": 32, "Standard": 64, "Original": None}
 
 # Page config
 st.set_page_config(
@@ -138,15 +145,15 @@ st.markdown(f"""
 </div>
 """, unsafe_allow_html=True)
 
-# Get chapters
-chapters = db_manager.get_all_chapters()
+# Catalog data comes from Streamlit's caches, so reruns (e.g. recorder taps) do no network I/O;
+# admins reload it from the dashboard's Manage Content page
+chapters, chapter_dict = get_chapters()
 if not chapters:
     st.error("No chapters found. Please check your database connection.")
     st.stop()
 
 # Create chapter options for dropdown
-chapter_options = ["Select a Chapter"] + [f"Chapter {ch['chapter_number']}: {ch['chapter_name']}" for ch in chapters]
-chapter_dict = {f"Chapter {ch['chapter_number']}: {ch['chapter_name']}": ch for ch in chapters}
+chapter_options = ["Select a Chapter"] + list(chapter_dict)
 
 # Chapter selection dropdown
 st.markdown("### 📚 Select Chapter")
@@ -159,7 +166,7 @@ selected_chapter_option = st.selectbox(
 # If a chapter is selected, show sloka dropdown
 if selected_chapter_option != "Select a Chapter":
     selected_chapter = chapter_dict[selected_chapter_option]
-    slokas = db_manager.get_slokas_by_chapter(selected_chapter["id"])
+    slokas = get_slokas(selected_chapter["id"])
     
     if not slokas:
         st.info("No slokas found for this chapter.")
@@ -234,11 +241,20 @@ if selected_chapter_option != "Select a Chapter":
             
             # Audio section
             st.markdown("### 🎵 Reference Audio")
-            ref_url = selected_sloka.get("reference_audio_url")
+            audio_quality = st.radio(
+                "Audio quality", list(AUDIO_QUALITY_KBPS), horizontal=True, key="audio_quality"
+            )
+            # Only formats this browser can play (no Ogg/Opus for Safari and iOS)
+            mimes = playable_mimes(st.context.headers.get("User-Agent", ""))
+            ref_url, ref_mime = reference_audio_for(
+                selected_chapter['chapter_number'], selected_sloka, AUDIO_QUALITY_KBPS[audio_quality], mimes
+            )
             if ref_url:
-                st.audio(ref_url, format="audio/mp3")
+                st.audio(ref_url, format=ref_mime)
             else:
                 st.info("No reference audio available for this sloka.")
+            # Warm the next verses (text and the start of their audio) while this one is open
+            prefetch_next(selected_chapter, slokas, selected_sloka, AUDIO_QUALITY_KBPS[audio_quality], mimes)
             
             # Submission section
             st.markdown("### 🎤 Share Your Learning")
@@ -253,15 +269,16 @@ if selected_chapter_option != "Select a Chapter":
                 rec_bytes = st.session_state.get(rec_key)
                 exp_bytes = st.session_state.get(exp_key)
 
-                def duration_mm_ss(audio_bytes: bytes) -> str:
-                    try:
-                        with contextlib.closing(wave.open(BytesIO(audio_bytes), 'rb')) as wf:
-                            frames = wf.getnframes()
-                            rate = wf.getframerate()
-                            secs = int(frames / float(rate))
-                            return f"{secs // 60:02d}:{secs % 60:02d}"
-                    except Exception:
-                        return "00:00"
+                # Audio details are probed once per recording/upload and kept in session, so
+                # reruns show them without reopening the audio
+                rec_meta_key = f"{rec_key}_meta"
+                exp_meta_key = f"{exp_key}_meta"
+                upload_meta = st.session_state.setdefault("upload_audio_meta", {})
+
+                def uploaded_meta(uploaded):
+                    if uploaded.file_id not in upload_meta:
+                        upload_meta[uploaded.file_id] = probe_audio(uploaded, uploaded.name)
+                    return upload_meta[uploaded.file_id]
 
                 # Add/reset counters to force widget to reset on delete
                 rec_rev_key = f"rec_rev_{selected_sloka['id']}"
@@ -288,21 +305,27 @@ if selected_chapter_option != "Select a Chapter":
                         icon_size="3x",
                         key=f"rec_audio_widget_{selected_sloka['id']}_{st.session_state[rec_rev_key]}",
                     )
-                    if new_rec:  # capture after stop
+                    if new_rec and new_rec != rec_bytes:  # capture after stop
                         st.session_state[rec_key] = new_rec
+                        st.session_state[rec_meta_key] = probe_audio(new_rec)
                         rec_bytes = new_rec
 
                     if rec_bytes:
                         st.markdown("✅ Recitation recorded")
                         st.audio(rec_bytes, format="audio/wav")
-                        st.caption(f"⏱️ Duration: {duration_mm_ss(rec_bytes)}")
+                        rec_meta = st.session_state.get(rec_meta_key) or probe_audio(rec_bytes)
+                        st.session_state[rec_meta_key] = rec_meta
+                        st.caption(f"⏱️ {describe_audio(rec_meta)}")
                         if st.button("🗑️ Delete Recitation", key=f"del_rec_{selected_sloka['id']}"):
                             st.session_state.pop(rec_key, None)
+                            st.session_state.pop(rec_meta_key, None)
                             st.session_state[rec_rev_key] += 1  # force new widget key
                             st.rerun()
                     rec_file = st.file_uploader(
                         "Or upload recitation file", type=["mp3", "wav"], key=f"rec_file_{selected_sloka['id']}"
                     )
+                    if rec_file:
+                        st.caption(f"⏱️ {describe_audio(uploaded_meta(rec_file))}")
 
                 with col2:
                     st.markdown("**💭 Explanation Recording**")
@@ -321,61 +344,99 @@ if selected_chapter_option != "Select a Chapter":
                         icon_size="3x",
                         key=f"exp_audio_widget_{selected_sloka['id']}_{st.session_state[exp_rev_key]}",
                     )
-                    if new_exp:
+                    if new_exp and new_exp != exp_bytes:
                         st.session_state[exp_key] = new_exp
+                        st.session_state[exp_meta_key] = probe_audio(new_exp)
                         exp_bytes = new_exp
 
                     if exp_bytes:
                         st.markdown("✅ Explanation recorded")
                         st.audio(exp_bytes, format="audio/wav")
-                        st.caption(f"⏱️ Duration: {duration_mm_ss(exp_bytes)}")
+                        exp_meta = st.session_state.get(exp_meta_key) or probe_audio(exp_bytes)
+                        st.session_state[exp_meta_key] = exp_meta
+                        st.caption(f"⏱️ {describe_audio(exp_meta)}")
                         if st.button("🗑️ Delete Explanation", key=f"del_exp_{selected_sloka['id']}"):
                             st.session_state.pop(exp_key, None)
+                            st.session_state.pop(exp_meta_key, None)
                             st.session_state[exp_rev_key] += 1  # force new widget key
                             st.rerun()
                     exp_file = st.file_uploader(
                         "Or upload explanation file", type=["mp3", "wav"], key=f"exp_file_{selected_sloka['id']}"
                     )
+                    if exp_file:
+                        st.caption(f"⏱️ {describe_audio(uploaded_meta(exp_file))}")
 
-            # Submit without a form (works better with recorder widgets)
-            submit_btn = st.button("🚀 Submit Learning", use_container_width=True)
+            # Submit without a form (works better with recorder widgets).
+            # Uploads run in the background; the page stays usable while they finish.
+            job_key = f"submission_job_{selected_sloka['id']}"
+            job = st.session_state.get(job_key)
+            submit_btn = st.button("🚀 Submit Learning", use_container_width=True, disabled=bool(job and job.running))
             if submit_btn:
                 if not (st.session_state.get(rec_key) or st.session_state.get(exp_key) or rec_file or exp_file):
                     st.markdown('<div class="error-message">Please record or upload at least one audio file.</div>', unsafe_allow_html=True)
                 else:
+                    new_job = SubmissionJob(user_id=user['id'], sloka_id=selected_sloka['id'], bucket="audio")
                     try:
-                        bucket = "audio"
-                        rec_url = None
-                        exp_url = None
-
-                        if st.session_state.get(rec_key):
-                            rec_name = f"user_submissions/{user['id']}/rec_{selected_sloka['id']}_{datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')}_{uuid.uuid4().hex}.wav"
-                            db_manager.supabase.storage.from_(bucket).upload(rec_name, st.session_state[rec_key])
-                            rec_url = db_manager.supabase.storage.from_(bucket).get_public_url(rec_name)
-                        elif rec_file:
-                            rec_name = f"user_submissions/{user['id']}/rec_{selected_sloka['id']}_{datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')}_{uuid.uuid4().hex}{os.path.splitext(rec_file.name)[1]}"
-                            db_manager.supabase.storage.from_(bucket).upload(rec_name, rec_file.read())
-                            rec_url = db_manager.supabase.storage.from_(bucket).get_public_url(rec_name)
-
-                        if st.session_state.get(exp_key):
-                            exp_name = f"user_submissions/{user['id']}/exp_{selected_sloka['id']}_{datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')}_{uuid.uuid4().hex}.wav"
-                            db_manager.supabase.storage.from_(bucket).upload(exp_name, st.session_state[exp_key])
-                            exp_url = db_manager.supabase.storage.from_(bucket).get_public_url(exp_name)
-                        elif exp_file:
-                            exp_name = f"user_submissions/{user['id']}/exp_{selected_sloka['id']}_{datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')}_{uuid.uuid4().hex}{os.path.splitext(exp_file.name)[1]}"
-                            db_manager.supabase.storage.from_(bucket).upload(exp_name, exp_file.read())
-                            exp_url = db_manager.supabase.storage.from_(bucket).get_public_url(exp_name)
-
-                        db_manager.create_user_submission(
-                            user_id=user['id'],
-                            sloka_id=selected_sloka['id'],
-                            recitation_audio_url=rec_url,
-                            explanation_audio_url=exp_url
-                        )
-                        st.markdown('<div class="success-message">✅ Your submission has been saved successfully!</div>', unsafe_allow_html=True)
+                        stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')
+
+                        def add_audio(kind, recorded, uploaded):
+                            """Normalize WAV (mono, speech rate, Opus) and queue it on the job; other files stream as-is."""
+                            if uploaded and not recorded and uploaded.size > SUBMISSION_MAX_UPLOAD_BYTES:
+                                raise ValueError(f"{uploaded.name} is larger than the {SUBMISSION_MAX_UPLOAD_BYTES // (1024 * 1024)} MB limit")
+                            prefix = f"user_submissions/{user['id']}/{kind}_{selected_sloka['id']}_{stamp}_{uuid.uuid4().hex}"
+                            if recorded or uploaded.name.lower().endswith('.wav'):
+                                try:
+                                    prepared = prepare_submission_audio(recorded or uploaded, max_bytes=SUBMISSION_MAX_UPLOAD_BYTES)
+                                except (wave.Error, EOFError):
+                                    # WAVs the wave module can't read (float32, WAVE_FORMAT_EXTENSIBLE)
+                                    # are uploaded as they are, as before normalization existed
+                                    if recorded:
+                                        raise
+                                    uploaded.seek(0)
+                                    prepared = None
+                                if prepared:
+                                    new_job.add_part(kind, prepared['file'], prefix + prepared['ext'], prepared['mime'],
+                                                     metadata=prepared['metadata'], size=prepared['size'], close_after=True)
+                                    for rendition in prepared['renditions']:
+                                        new_job.add_part(f"{kind}{rendition['ext']}", rendition['file'],
+                                                         prefix + rendition['ext'], rendition['mime'],
+                                                         size=rendition['size'], close_after=True, rendition_of=kind)
+                                    return
+                            new_job.add_part(kind, uploaded, prefix + os.path.splitext(uploaded.name)[1],
+                                         uploaded.type or "audio/mpeg", metadata=uploaded_meta(uploaded),
+                                         size=uploaded.size)
+
+                        if st.session_state.get(rec_key) or rec_file:
+                            add_audio("recitation", st.session_state.get(rec_key), rec_file)
+                        if st.session_state.get(exp_key) or exp_file:
+                            add_audio("explanation", st.session_state.get(exp_key), exp_file)
+
+                        new_job.start()
+                        st.session_state[job_key] = job = new_job
                     except Exception as e:
+                        # Nothing was started: release temp files already queued and keep showing
+                        # whatever job (if any) this verse had before
+                        new_job.discard()
+                        job = st.session_state.get(job_key)
                         st.markdown(f'<div class="error-message">❌ Submission failed: {str(e)}</div>', unsafe_allow_html=True)
-            
+
+            def show_submission_progress():
+                if job.running:
+                    st.progress(job.progress, text=f"⏫ Uploading your submission... {int(job.progress * 100)}%")
+                else:
+                    st.rerun()  # finished: refresh the page once and stop polling
+
+            if job and job.running:
+                st.fragment(run_every=1)(show_submission_progress)()
+            elif job and job.status == 'done':
+                st.markdown('<div class="success-message">✅ Your submission has been saved successfully!</div>', unsafe_allow_html=True)
+                st.session_state.pop(job_key, None)
+            elif job and job.status == 'failed':
+                st.markdown(f'<div class="error-message">❌ Submission failed: {job.error}</div>', unsafe_allow_html=True)
+                if st.button("🔁 Retry Upload", key=f"retry_{selected_sloka['id']}", use_container_width=True):
+                    job.retry()
+                    st.rerun()
+
             st.markdown("</div>", unsafe_allow_html=True)
 
 # Footer
@@ -0,0 +1,94 @@
+import html
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+from config import PREFETCH_AHEAD, PREFETCH_SESSION_TRACKS
+from database.db_utils import db_manager
+from media.renditions import UNIVERSAL_MIMES, reference_audio_for
+from streamlit_app.catalog import get_chapters, get_slokas
+
+# Warms DatabaseManager's catalog cache for the next chapter; shared by every session
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="prefetch")
+# Chapter futures kept per session (the one being warmed and the one before it); older ones are dropped
+_MAX_CHAPTER_FUTURES = 2
+
+
+class PrefetchBudget:
+    """
+    The distinct tracks a session has prefetched, at most max_tracks of them. Once the budget
+    is spent new tracks are refused; ones already admitted stay allowed, since re-emitting
+    their tag costs nothing (the browser has them cached).
+    """
+
+    def __init__(self, max_tracks: int):
+        self.max_tracks = max_tracks
+        self._admitted = set()
+
+    def admit(self, key):
+        if key in self._admitted:
+            return True
+        if len(self._admitted) >= self.max_tracks:
+            return False
+        self._admitted.add(key)
+        return True
+
+    def __len__(self):
+        return len(self._admitted)
+
+
+def _session_state():
+    return st.session_state.setdefault("prefetch", {
+        'budget': PrefetchBudget(PREFETCH_SESSION_TRACKS),
+        'chapters': OrderedDict(),  # chapter_id -> future warming its slokas, newest last
+    })
+
+
+def upcoming_slokas(chapter: dict, slokas: list, sloka: dict, ahead: int = PREFETCH_AHEAD):
+    """
+    (chapter, sloka) for the `ahead` verses after `sloka` in reading order. Near the end of
+    a chapter the next chapter's slokas are fetched in the background and included once
+    they have arrived.
+    """
+    state = _session_state()
+    ids = [s['id'] for s in slokas]
+    position = ids.index(sloka['id']) if sloka['id'] in ids else len(ids)
+    upcoming = [(chapter, s) for s in slokas[position + 1:position + 1 + ahead]]
+    if len(upcoming) < ahead:
+        chapters, _ = get_chapters()
+        following = [ch for ch in chapters if ch['chapter_number'] > chapter['chapter_number']]
+        if following:
+            next_chapter = following[0]
+            next_id = next_chapter['id']
+            future = state['chapters'].get(next_id)
+            if future is None:
+                state['chapters'][next_id] = _executor.submit(db_manager.get_slokas_by_chapter, next_id)
+                while len(state['chapters']) > _MAX_CHAPTER_FUTURES:
+                    state['chapters'].popitem(last=False)
+            elif future.done():
+                if future.exception() or not future.result():
+                    del state['chapters'][next_id]  # try again on a later rerun
+                else:
+                    # Already in DatabaseManager's cache, so this does no network I/O
+                    upcoming += [(next_chapter, s) for s in get_slokas(next_id)[:ahead - len(upcoming)]]
+    return upcoming
+
+
+def prefetch_next(chapter: dict, slokas: list, sloka: dict, max_kbps=None, mimes=UNIVERSAL_MIMES):
+    """
+    Have the browser fetch the first bytes of the next verses' reference audio (at the
+    selected quality, in the formats it can play) while the learner is on this one: at most
+    PREFETCH_AHEAD verses per page, and PREFETCH_SESSION_TRACKS tracks over the session.
+    """
+    if PREFETCH_AHEAD <= 0:
+        return
+    budget = _session_state()['budget']
+    tags = []
+    for upcoming_chapter, upcoming in upcoming_slokas(chapter, slokas, sloka):
+        url, _ = reference_audio_for(upcoming_chapter['chapter_number'], upcoming, max_kbps, mimes)
+        if url and budget.admit(url):
+            # preload="metadata" fetches only the start of the file, enough to begin playback
+            tags.append(f'<audio preload="metadata" src="{html.escape(url, quote=True)}" style="display:none"></audio>')
+    if tags:
+        st.markdown("".join(tags), unsafe_allow_html=True)
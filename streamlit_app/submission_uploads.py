@@ -0,0 +1,129 @@
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from config import SUBMISSION_UPLOAD_WORKERS, SUBMISSION_MAX_UPLOAD_BYTES
+from database.db_utils import db_manager
+from media.retry import retry_with_backoff
+
+# Shared by every session in the process so a burst of submissions cannot spawn unbounded threads
+_executor = ThreadPoolExecutor(max_workers=SUBMISSION_UPLOAD_WORKERS, thread_name_prefix="submission")
+
+
+class SubmissionJob:
+    """
+    Uploads the audio parts of one submission concurrently, then inserts the
+    user_submissions row, all off the Streamlit script thread. Parts that finished
+    keep their URL, so retry() only re-sends what failed (resuming partial uploads).
+    """
+
+    def __init__(self, user_id: str, sloka_id: str, bucket: str):
+        self.user_id = user_id
+        self.sloka_id = sloka_id
+        self.bucket = bucket
+        self.parts = {}
+        self.status = 'pending'
+        self.error = None
+        self.submission = None
+        # Generated once per job, so retried inserts (and the Retry button) can't duplicate the row
+        self.submission_id = str(uuid.uuid4())
+        self._lock = threading.Lock()
+
+    def add_part(self, kind: str, source, object_name: str, mime: str, metadata: dict = None, size: int = 0,
+                 close_after: bool = False, rendition_of: str = None):
+        """
+        Queue one audio file; close_after closes source (e.g. a temp file) once it is uploaded.
+        A part with rendition_of is another format of that part, recorded under its metadata's
+        'renditions' as {mime, url}.
+        """
+        self.parts[kind] = {
+            'source': source,
+            'object_name': object_name,
+            'mime': mime,
+            'metadata': metadata,
+            'url': None,
+            'sent': 0,
+            'total': size,
+            'error': None,
+            'close_after': close_after,
+            'rendition_of': rendition_of,
+        }
+
+    @property
+    def progress(self):
+        """Overall fraction of bytes sent, 0.0 - 1.0."""
+        total = sum(part['total'] for part in self.parts.values())
+        sent = sum(part['total'] if part['url'] else part['sent'] for part in self.parts.values())
+        return (sent / total) if total else (1.0 if self.status == 'done' else 0.0)
+
+    @property
+    def running(self):
+        return self.status in ('pending', 'running')
+
+    def start(self):
+        with self._lock:
+            if self.status == 'running':
+                return
+            self.status = 'running'
+            self.error = None
+        _executor.submit(self._run)
+
+    retry = start
+
+    def discard(self):
+        """Close the close_after sources of a job that will never be started."""
+        for part in self.parts.values():
+            if part['close_after'] and not part['url']:
+                part['source'].close()
+
+    def _upload_part(self, kind):
+        part = self.parts[kind]
+
+        def on_progress(sent, total):
+            part['sent'], part['total'] = sent, total
+
+        try:
+            part['url'] = db_manager.upload_audio(
+                self.bucket, part['object_name'], part['source'], part['mime'],
+                owner=self.user_id, on_progress=on_progress, max_bytes=SUBMISSION_MAX_UPLOAD_BYTES,
+            )
+            part['error'] = None
+            if part['close_after']:
+                part['source'].close()
+        except Exception as e:
+            part['error'] = str(e)
+
+    def _insert_row(self):
+        audio_metadata = {kind: dict(part['metadata']) for kind, part in self.parts.items()
+                          if part['metadata'] and not part['rendition_of']}
+        for part in self.parts.values():
+            if part['rendition_of']:
+                audio_metadata.setdefault(part['rendition_of'], {}).setdefault('renditions', []).append(
+                    {'mime': part['mime'], 'url': part['url']})
+        row = db_manager.create_user_submission(
+            user_id=self.user_id,
+            sloka_id=self.sloka_id,
+            recitation_audio_url=self.parts.get('recitation', {}).get('url'),
+            explanation_audio_url=self.parts.get('explanation', {}).get('url'),
+            audio_metadata=audio_metadata,
+            submission_id=self.submission_id,
+        )
+        if not row:
+            raise RuntimeError("Could not save the submission record")
+        return row
+
+    def _run(self):
+        try:
+            pending = [kind for kind, part in self.parts.items() if not part['url']]
+            # Parts go up in parallel on their own small pool; the shared pool only runs jobs
+            with ThreadPoolExecutor(max_workers=max(1, len(pending))) as uploads:
+                list(uploads.map(self._upload_part, pending))
+            failed = {kind: part['error'] for kind, part in self.parts.items() if not part['url']}
+            if failed:
+                raise RuntimeError("; ".join(f"{kind} upload failed: {error}" for kind, error in failed.items()))
+            # Idempotent (keyed by submission_id), so any failure is safe to retry
+            self.submission = retry_with_backoff(self._insert_row, retries=3, retry_if=lambda e: True)
+            self.status = 'done'
+        except Exception as e:
+            self.error = str(e)
+            self.status = 'failed'